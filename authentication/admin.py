@@ -2,7 +2,9 @@ from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin, UserAdmin
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
-from .models import CustomUser, EmailVerificationModel, PasswordResetCodeModel
+from django.db.models import Q
+from .models import CustomUser, OneTimeCode
+from .pagination import EstimatedCountPaginator
 
 class CustomUserCreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
@@ -14,7 +16,44 @@ class CustomUserChangeForm(UserChangeForm):
         model = CustomUser
         fields = '__all__'
 
-class CustomUserAdmin(UserAdmin):
+class IndexedSearchMixin:
+    """
+    Replaces the admin's default `icontains` search (a full scan on big tables)
+    with lookups the Lower() indexes can serve:
+
+    * a term containing "@" matches emails starting with it (a full address is
+      an exact match)
+    * a number matches that id
+    * anything else matches usernames starting with it
+    """
+
+    search_help_text = 'Email, id or the start of a username (case-insensitive).'
+    email_lookup = 'email'
+    username_lookup = 'username'
+    id_lookup = 'pk'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip().lower()
+
+        if not term:
+            return queryset, False
+
+        if '@' in term:
+            query = Q(**{f'{self.email_lookup}__lower__startswith': term})
+        else:
+            query = Q(**{f'{self.username_lookup}__lower__startswith': term})
+
+            if term.isdigit():
+                query |= Q(**{self.id_lookup: int(term)})
+
+        return queryset.filter(query), False
+
+class LargeTableAdminMixin:
+    # no exact COUNT(*) of the whole table on every changelist page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+class CustomUserAdmin(IndexedSearchMixin, LargeTableAdminMixin, UserAdmin):
     form = CustomUserChangeForm
     add_form = CustomUserCreationForm
 
@@ -38,9 +77,24 @@ class CustomUserAdmin(UserAdmin):
 
     list_filter = ('is_staff', 'is_active', 'is_verified')
 
-    ordering = ('email',)
+    # newest first, walks the primary key index
+    ordering = ('-id',)
+
+class CodeAdmin(IndexedSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'purpose', 'created_at', 'expires_at')
+    list_filter = ('purpose',)
+    # __str__ uses user.username, join it instead of one query per row
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    ordering = ('-id',)
+
+    search_help_text = 'User email, user id or the start of a username.'
+    email_lookup = 'user__email'
+    username_lookup = 'user__username'
+    id_lookup = 'user_id'
+    search_fields = ('user__email', 'user__username')
+
 
 # Register your models here.
 admin.site.register(CustomUser, CustomUserAdmin)
-admin.site.register(EmailVerificationModel)
-admin.site.register(PasswordResetCodeModel)
\ No newline at end of file
+admin.site.register(OneTimeCode, CodeAdmin)
\ No newline at end of file
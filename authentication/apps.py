@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "authentication"
+
+    def ready(self):
+        from django.db.models import CharField
+        from django.db.models.functions import Lower
+
+        # allows `field__lower=value`, which matches the Lower() functional indexes
+        CharField.register_lookup(Lower)
+
+        from . import signals  # noqa: F401
@@ -0,0 +1,141 @@
+"""
+Opt-in JWT authentication classes that skip the per-request user query
+
+    class MyView(APIView):
+        authentication_classes = [ClaimsJWTAuthentication]
+
+ClaimsJWTAuthentication never touches the db, the user is built from the
+claims baked into the token by UserRefreshToken, so they can be as stale as
+the access token lifetime. CachedJWTAuthentication returns the real user but
+keeps its CACHED_USER_FIELDS in the cache for JWT_USER_CACHE_TIMEOUT seconds,
+the entry is dropped whenever the user is written or deleted (see signals.py).
+"""
+
+"""django imports"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+"""drf imports"""
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+"""local imports"""
+from .routers import PRIMARY
+
+# what CachedJWTAuthentication keeps of a user, never the password hash
+CACHED_USER_FIELDS = [
+    "id",
+    "email",
+    "username",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "is_verified",
+    "version",
+]
+
+
+class ClaimsUser(TokenUser):
+    """Stateless user backed by the token claims set in UserRefreshToken"""
+
+    @cached_property
+    def is_verified(self):
+        return self.token.get("is_verified", False)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return ClaimsUser(validated_token)
+
+
+# bumped to drop every cached user at once, entries remember the one they
+# were loaded under
+USER_CACHE_GENERATION_KEY = "jwt_user:generation"
+
+
+def user_cache_key(user_id):
+    return f"jwt_user:{user_id}"
+
+
+def invalidate_cached_users():
+    cache.add(USER_CACHE_GENERATION_KEY, 0, None)
+    try:
+        cache.incr(USER_CACHE_GENERATION_KEY)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(USER_CACHE_GENERATION_KEY, 1, None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        key = user_cache_key(user_id)
+        found = cache.get_many([key, USER_CACHE_GENERATION_KEY])
+        generation = found.get(USER_CACHE_GENERATION_KEY, 0)
+        cached = found.get(key)
+
+        # read before loading, a bump racing the load only costs another miss
+        if cached is None or cached[0] != generation:
+            cached = (generation, *self.load_user(user_id))
+            cache.set(key, cached, settings.JWT_USER_CACHE_TIMEOUT)
+
+        _, fields, password_hash = cached
+
+        # same checks as JWTAuthentication.get_user
+        if api_settings.CHECK_USER_IS_ACTIVE and not fields["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        # the other fields are deferred, loaded from the db if a view needs them
+        names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in fields
+        ]
+        return self.user_model.from_db(
+            PRIMARY, names, [fields[name] for name in names]
+        )
+
+    def load_user(self, user_id):
+        """
+        (fields, md5 of the password hash) to cache, read from the primary so a
+        lagging replica can't put an outdated user back in the cache
+        """
+
+        try:
+            user = (
+                self.user_model.objects.using(PRIMARY)
+                .only(*CACHED_USER_FIELDS, "password")
+                .get(**{api_settings.USER_ID_FIELD: user_id})
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+
+        fields = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+        return fields, get_md5_hash_password(user.password)
@@ -0,0 +1,276 @@
+"""
+Per-process Bloom filter of blacklisted refresh token JTIs
+
+UserRefreshToken.check_blacklist() only queries BlacklistedToken when the
+filter reports a probable hit, a miss is always correct so most refreshes
+skip the db. The filter is built from the db in a background thread and
+swapped in once complete, until then every check goes to the db. It's kept
+fresh by:
+
+* the post_save signal on BlacklistedToken (this process, immediately)
+* a change counter in the default cache, bumped when the blacklisting
+  transaction commits (other processes, on their next check, needs a shared
+  cache like redis/memcached)
+* an incremental sync every SYNC_INTERVAL seconds as backstop
+
+Syncs read the rows blacklisted since the newest one seen, minus SYNC_SLACK
+seconds, so rows committed late or stamped by a server with a slightly
+different clock aren't missed. Migration 0009 indexes blacklisted_at for it.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+"""django imports"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+CHANGES_CACHE_KEY = "token_blacklist:changes"
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = self.optimal_size(capacity, error_rate)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.size / 8))
+        self.count = 0
+
+    @staticmethod
+    def optimal_size(capacity, error_rate):
+        """Number of bits needed to hold capacity items at error_rate"""
+        return math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+
+    def positions(self, item):
+        # double hashing, k positions from one 128 bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        # re-adding changes no bits, skip it so count stays close to reality
+        if item in self:
+            return
+
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items):
+        """add() for items known to be distinct, without the membership check"""
+
+        bits, positions = self.bits, self.positions
+        count = 0
+
+        for item in items:
+            for position in positions(item):
+                bits[position >> 3] |= 1 << (position & 7)
+            count += 1
+
+        self.count += count
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    @property
+    def false_positive_rate(self):
+        """Expected false positive rate at the current number of items"""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.bloom = None
+        self.loading = False
+        self.added_while_loading = []
+        self.synced_until = None  # newest blacklisted_at seen
+        self.synced_at = 0.0
+        self.changes = None  # CHANGES_CACHE_KEY at the last sync
+
+    @property
+    def config(self):
+        return settings.TOKEN_BLACKLIST_FILTER
+
+    def build(self, capacity=None):
+        """(filter, newest blacklisted_at) from every BlacklistedToken row"""
+
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        rows = BlacklistedToken.objects.values_list("token__jti", "blacklisted_at")
+        total = rows.count()
+        bloom = BloomFilter(
+            max(capacity or self.config["CAPACITY"], total * 2),
+            self.config["ERROR_RATE"],
+        )
+        newest = None
+
+        def jtis():
+            nonlocal newest
+
+            for jti, blacklisted_at in rows.iterator(chunk_size=10_000):
+                if newest is None or blacklisted_at > newest:
+                    newest = blacklisted_at
+                yield jti
+
+        # a jti is blacklisted once, BlacklistedToken.token is one to one
+        bloom.update(jtis())
+
+        return bloom, newest
+
+    def load(self, capacity=None):
+        """(Re)build the filter and swap it in, requests keep the old one meanwhile"""
+
+        changes = cache.get(CHANGES_CACHE_KEY)
+
+        try:
+            bloom, synced_until = self.build(capacity)
+        except Exception:
+            with self.lock:
+                self.loading = False
+                self.added_while_loading = []
+            raise
+
+        with self.lock:
+            for jti in self.added_while_loading:
+                bloom.add(jti)
+            self.added_while_loading = []
+            self.loading = False
+
+            # changes is from before the build, anything published since makes
+            # the next check sync
+            self.bloom, self.synced_until, self.changes = bloom, synced_until, changes
+            self.synced_at = time.monotonic()
+
+    def load_in_background(self, capacity=None):
+        try:
+            self.load(capacity)
+        except Exception:
+            logger.exception("Building the blacklisted token filter failed.")
+        finally:
+            # this thread's own db connections
+            connections.close_all()
+
+    def start_loading(self, capacity=None):
+        with self.lock:
+            if self.loading:
+                return
+            self.loading = True
+
+        if self.config["LOAD_IN_BACKGROUND"]:
+            threading.Thread(
+                target=self.load_in_background,
+                args=(capacity,),
+                name="blacklist-filter-load",
+                daemon=True,
+            ).start()
+        else:
+            self.load(capacity)
+
+    def sync(self):
+        """Add rows blacklisted since the last load/sync, by other processes"""
+
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        self.changes = cache.get(CHANGES_CACHE_KEY)
+        rows = BlacklistedToken.objects.values_list("token__jti", "blacklisted_at")
+
+        if self.synced_until is not None:
+            since = self.synced_until - timedelta(seconds=self.config["SYNC_SLACK"])
+            rows = rows.filter(blacklisted_at__gte=since)
+
+        for jti, blacklisted_at in rows.iterator(chunk_size=10_000):
+            self.bloom.add(jti)
+            if self.synced_until is None or blacklisted_at > self.synced_until:
+                self.synced_until = blacklisted_at
+
+        self.synced_at = time.monotonic()
+
+    def ensure_fresh(self):
+        """False while the filter is still being built"""
+
+        if self.bloom is None:
+            self.start_loading()
+            return self.bloom is not None
+
+        stale = time.monotonic() - self.synced_at > self.config["SYNC_INTERVAL"]
+        if not stale and cache.get(CHANGES_CACHE_KEY) == self.changes:
+            return True
+
+        # one thread syncs, the others go on with the filter as it is
+        if self.lock.acquire(blocking=False):
+            try:
+                self.sync()
+            finally:
+                self.lock.release()
+
+        if self.bloom.count > self.bloom.capacity:
+            # past capacity the error rate climbs fast, rebuild bigger
+            self.start_loading(capacity=self.bloom.capacity * 2)
+
+        return True
+
+    def might_contain(self, jti):
+        """False means jti is definitely not blacklisted"""
+
+        if not self.ensure_fresh():
+            return True
+
+        return jti in self.bloom
+
+    def add(self, jti):
+        """Record a token blacklisted by this process, see signals.py"""
+
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+            if self.loading:
+                self.added_while_loading.append(jti)
+
+    def publish(self):
+        """Tell other processes to sync, once the blacklisting has committed"""
+
+        cache.add(CHANGES_CACHE_KEY, 0, None)
+        try:
+            cache.incr(CHANGES_CACHE_KEY)
+        except ValueError:
+            # evicted between add() and incr()
+            cache.set(CHANGES_CACHE_KEY, 1, None)
+
+    def stats(self):
+        if self.bloom is None:
+            self.load()
+
+        return {
+            "tokens": self.bloom.count,
+            "capacity": self.bloom.capacity,
+            "bits": self.bloom.size,
+            "hashes": self.bloom.hashes,
+            "memory_bytes": self.bloom.memory_bytes,
+            "target_false_positive_rate": self.bloom.error_rate,
+            "estimated_false_positive_rate": self.bloom.false_positive_rate,
+        }
+
+
+blacklist_filter = BlacklistFilter()
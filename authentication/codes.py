@@ -0,0 +1,181 @@
+"""
+One-time codes (email verification, password reset) behind a small store API
+
+    store = get_code_store()
+    code = store.issue(user, VERIFY_EMAIL)
+    store.verify(user, VERIFY_EMAIL, code)  # True once, codes are single-use
+    store.invalidate(user, VERIFY_EMAIL)
+
+The backend is chosen with ONE_TIME_CODES["BACKEND"] in settings.
+"""
+
+from datetime import timedelta
+
+"""django imports"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+"""local imports"""
+from .models import OneTimeCode
+from .uitls import generate_strong_6_digit_number
+
+
+VERIFY_EMAIL = OneTimeCode.Purpose.VERIFY_EMAIL
+RESET_PASSWORD = OneTimeCode.Purpose.RESET_PASSWORD
+
+
+class BaseCodeStore:
+    def __init__(self, ttl=15 * 60, **options):
+        self.ttl = ttl
+
+    def issue(self, user, purpose):
+        """Create a new code for user, replacing any previous one, returns the code"""
+        raise NotImplementedError
+
+    def verify(self, user, purpose, code):
+        """Consume the code if it matches and hasn't expired, returns True on success"""
+        raise NotImplementedError
+
+    def invalidate(self, user, purpose):
+        """Drop the current code for user, if any"""
+        raise NotImplementedError
+
+    @staticmethod
+    def normalize(code):
+        try:
+            return int(code)
+        except (TypeError, ValueError):
+            return None
+
+
+class ModelCodeStore(BaseCodeStore):
+    """Stores codes as OneTimeCode rows, one per user and purpose"""
+
+    def issue(self, user, purpose):
+        code = generate_strong_6_digit_number()
+
+        # a single INSERT ... ON CONFLICT (user_id, purpose) DO UPDATE
+        OneTimeCode.objects.bulk_create(
+            [
+                OneTimeCode(
+                    user=user,
+                    purpose=purpose,
+                    code=code,
+                    expires_at=timezone.now() + timedelta(seconds=self.ttl),
+                )
+            ],
+            update_conflicts=True,
+            unique_fields=["user", "purpose"],
+            update_fields=["code", "created_at", "expires_at"],
+        )
+
+        return code
+
+    def verify(self, user, purpose, code):
+        code = self.normalize(code)
+
+        if code is None:
+            return False
+
+        # check and consume in one conditional UPDATE, of concurrent requests
+        # with the same code only one gets a row back
+        return bool(
+            OneTimeCode.objects.filter(
+                user=user, purpose=purpose, code=code, expires_at__gt=timezone.now()
+            ).update(code=None)
+        )
+
+    def invalidate(self, user, purpose):
+        OneTimeCode.objects.filter(user=user, purpose=purpose).update(code=None)
+
+
+class CacheCodeStore(BaseCodeStore):
+    """
+    Stores codes in a Django cache, expiry is the cache's native TTL
+
+    Each code lives under its own key so consuming it is an atomic
+    cache.delete(), only one concurrent request can see it return True
+    """
+
+    def __init__(self, ttl=15 * 60, cache_alias="default", key_prefix="otc", **options):
+        super().__init__(ttl=ttl, **options)
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def current_key(self, user, purpose):
+        return f"{self.key_prefix}:{purpose}:{user.pk}"
+
+    def code_key(self, user, purpose, code):
+        return f"{self.key_prefix}:{purpose}:{user.pk}:{code}"
+
+    def issue(self, user, purpose):
+        code = generate_strong_6_digit_number()
+
+        self.invalidate(user, purpose)
+        self.cache.set_many(
+            {
+                self.current_key(user, purpose): code,
+                self.code_key(user, purpose, code): True,
+            },
+            timeout=self.ttl,
+        )
+
+        return code
+
+    def verify(self, user, purpose, code):
+        code = self.normalize(code)
+
+        if code is None:
+            return False
+
+        key = self.code_key(user, purpose, code)
+
+        # get() filters out expired keys some backends haven't culled yet,
+        # delete() is what makes consuming atomic
+        if not self.cache.get(key) or not self.cache.delete(key):
+            return False
+
+        self.cache.delete(self.current_key(user, purpose))
+
+        return True
+
+    def invalidate(self, user, purpose):
+        current = self.cache.get(self.current_key(user, purpose))
+
+        if current is not None:
+            self.cache.delete_many(
+                [
+                    self.current_key(user, purpose),
+                    self.code_key(user, purpose, current),
+                ]
+            )
+
+
+_store = None
+
+
+def get_code_store():
+    global _store
+
+    if _store is None:
+        options = dict(settings.ONE_TIME_CODES)
+        backend = import_string(options.pop("BACKEND"))
+        _store = backend(**{key.lower(): value for key, value in options.items()})
+
+    return _store
+
+
+@receiver(setting_changed)
+def reset_code_store(setting, **kwargs):
+    global _store
+
+    if setting == "ONE_TIME_CODES":
+        _store = None
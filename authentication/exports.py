@@ -0,0 +1,74 @@
+"""
+Constant memory user exports, shared by the ExportUsers view and the
+`export_users` management command
+"""
+
+import csv
+import json
+
+"""django imports"""
+from django.core.serializers.json import DjangoJSONEncoder
+
+"""local imports"""
+from .models import CustomUser
+
+EXPORT_FIELDS = ["id", "email", "username", "is_verified", "date_joined"]
+
+
+def iter_users(chunk_size=2000):
+    """
+    Yield user rows as dicts ordered by primary key
+
+    Each page is its own short `WHERE id > last ORDER BY id LIMIT n` query,
+    so nothing is held open between pages and memory stays at one page no
+    matter how big the table is.
+    """
+
+    last_pk = 0
+
+    while True:
+        page = (
+            CustomUser.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values(*EXPORT_FIELDS)[:chunk_size]
+        )
+        count = 0
+
+        for row in page.iterator(chunk_size=chunk_size):
+            count += 1
+            last_pk = row["id"]
+            yield row
+
+        if count < chunk_size:
+            return
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+class Echo:
+    """File-like object whose write() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            [
+                row["date_joined"].isoformat() if field == "date_joined" else row[field]
+                for field in EXPORT_FIELDS
+            ]
+        )
+
+
+FORMATS = {
+    "ndjson": ndjson_lines,
+    "csv": csv_lines,
+}
@@ -0,0 +1,98 @@
+"""
+Per-request timing of the expensive parts of an auth request
+
+PerformanceTimingMiddleware starts a RequestTimings for sampled requests,
+code anywhere below it reports into it with:
+
+    with timed("hash"):
+        ...
+
+timed() is a no-op outside a sampled request, so hooks cost next to nothing
+when sampling is off.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.durations = {}  # name -> milliseconds
+        self.counts = {}  # name -> number of timed calls
+
+    def add(self, name, milliseconds):
+        self.durations[name] = self.durations.get(name, 0.0) + milliseconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook, times every query"""
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", (time.perf_counter() - start) * 1000)
+
+    def server_timing(self, total):
+        """Server-Timing header value, see https://w3c.github.io/server-timing/"""
+
+        metrics = [
+            f'db;dur={self.durations.get("db", 0):.2f};desc="{self.counts.get("db", 0)} queries"'
+        ]
+        metrics += [
+            f"{name};dur={duration:.2f}"
+            for name, duration in self.durations.items()
+            if name != "db"
+        ]
+        metrics.append(f"total;dur={total:.2f}")
+
+        return ", ".join(metrics)
+
+    def as_dict(self, total):
+        return {
+            "total_ms": round(total, 2),
+            "queries": self.counts.get("db", 0),
+            **{f"{name}_ms": round(value, 2) for name, value in self.durations.items()},
+        }
+
+
+def start():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    timings = _current.get()
+
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - start) * 1000)
+
+
+def timed_function(name):
+    """Decorator version of timed()"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,228 @@
+"""
+Asymmetric JWT signing with several keys, published as a JWK Set
+
+    JWT_SIGNING = {
+        "KEYS": {"2026-10": "<PEM>", "2026-04": "<PEM>"},  # kid -> PEM
+        "SIGNING_KID": "2026-10",
+    }
+
+New tokens are signed with SIGNING_KID's private key, RS256 for RSA keys
+and EdDSA for Ed25519 ones, and name it in their `kid` header. Any key in
+KEYS verifies the tokens it signed, with the algorithm of that key and never
+the one claimed by the token. Other services verify access tokens offline
+with the public keys served at /.well-known/jwks.json.
+
+Rotating: add the new key and wait for downstream JWKS caches to pick it up,
+switch SIGNING_KID to it, then drop the old key (or keep only its public
+half) once the tokens it signed have expired.
+
+Keys are parsed once per process. Without KEYS simplejwt's own backend
+(HS256 with SIMPLE_JWT["SIGNING_KEY"]) is used and the JWK Set is empty.
+"""
+
+import hashlib
+import json
+
+import jwt
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
+
+try:
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key,
+    )
+    from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+except ImportError:  # pragma: no cover - only needed with JWT_SIGNING["KEYS"]
+    rsa = None
+
+"""drf imports"""
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import (
+    TokenBackendError,
+    TokenBackendExpiredToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+"""django imports"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+
+
+class SigningKey:
+    """One JWT_SIGNING["KEYS"] entry, a private key or only a public one"""
+
+    def __init__(self, kid, pem):
+        if rsa is None:
+            raise ImproperlyConfigured(
+                'JWT_SIGNING["KEYS"] requires the cryptography package.'
+            )
+
+        if isinstance(pem, str):
+            pem = pem.encode()
+
+        try:
+            self.private_key = load_pem_private_key(pem, password=None)
+            self.public_key = self.private_key.public_key()
+        except ValueError:
+            self.private_key = None
+            self.public_key = load_pem_public_key(pem)
+
+        if isinstance(self.public_key, rsa.RSAPublicKey):
+            self.algorithm, jwk = "RS256", RSAAlgorithm.to_jwk
+        elif isinstance(self.public_key, ed25519.Ed25519PublicKey):
+            self.algorithm, jwk = "EdDSA", OKPAlgorithm.to_jwk
+        else:
+            raise ImproperlyConfigured(f"JWT key {kid} is neither RSA nor Ed25519.")
+
+        self.kid = kid
+        self.jwk = {
+            **jwk(self.public_key, as_dict=True),
+            "kid": kid,
+            "alg": self.algorithm,
+            "use": "sig",
+        }
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """TokenBackend signing with one of several keys and verifying with all"""
+
+    def __init__(
+        self, keys, signing_kid, audience=None, issuer=None, leeway=None, **options
+    ):
+        self.keys = {kid: SigningKey(kid, pem) for kid, pem in keys.items()}
+        self.current_key = self.keys.get(signing_kid)
+
+        if self.current_key is None or self.current_key.private_key is None:
+            raise ImproperlyConfigured(
+                'JWT_SIGNING["SIGNING_KID"] must name a private key in '
+                'JWT_SIGNING["KEYS"].'
+            )
+
+        super().__init__(
+            self.current_key.algorithm,
+            audience=audience,
+            issuer=issuer,
+            leeway=leeway,
+            **options,
+        )
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            self.current_key.private_key,
+            algorithm=self.current_key.algorithm,
+            headers={"kid": self.current_key.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.keys.get(kid) if isinstance(kid, str) else None
+
+            if key is None:
+                raise TokenBackendError(_("Token is invalid"))
+
+            return jwt.decode(
+                token,
+                key.public_key,
+                algorithms=[key.algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except ExpiredSignatureError as e:
+            raise TokenBackendExpiredToken(_("Token is expired")) from e
+        except InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+
+_backend = None
+_jwks = None  # (body, etag) of the current backend's JWK Set
+
+
+def get_token_backend():
+    global _backend
+
+    if _backend is None:
+        config = settings.JWT_SIGNING
+
+        if config["KEYS"]:
+            _backend = KeyRingTokenBackend(
+                config["KEYS"],
+                config["SIGNING_KID"],
+                audience=api_settings.AUDIENCE,
+                issuer=api_settings.ISSUER,
+                leeway=api_settings.LEEWAY,
+                json_encoder=api_settings.JSON_ENCODER,
+            )
+        else:
+            from rest_framework_simplejwt.state import token_backend
+
+            _backend = token_backend
+
+    return _backend
+
+
+def get_jwks():
+    """(body, etag) of the JWK Set, built once per backend"""
+
+    global _jwks
+
+    if _jwks is None:
+        backend = get_token_backend()
+        keys = getattr(backend, "keys", {})
+        body = json.dumps(
+            {"keys": [key.jwk for key in keys.values()]}, separators=(",", ":")
+        ).encode()
+        _jwks = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    return _jwks
+
+
+@receiver(setting_changed)
+def reset_token_backend(setting, **kwargs):
+    global _backend, _jwks
+
+    if setting in ("JWT_SIGNING", "SIMPLE_JWT"):
+        _backend = _jwks = None
+
+
+class JWKSView(View):
+    """
+    Public keys verifying our tokens, with an ETag and cacheable for
+    JWT_SIGNING["JWKS_MAX_AGE"] seconds
+    """
+
+    def get(self, request):
+        body, etag = get_jwks()
+
+        if_none_match = set(parse_etags(request.headers.get("If-None-Match", "")))
+        if if_none_match & {"*", etag}:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+
+        response["ETag"] = etag
+        response["Cache-Control"] = (
+            f"public, max-age={settings.JWT_SIGNING['JWKS_MAX_AGE']}"
+        )
+
+        return response
@@ -0,0 +1,48 @@
+import math
+
+"""django imports"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+"""local imports"""
+from authentication.blacklist import BloomFilter, blacklist_filter
+
+
+class Command(BaseCommand):
+    help = (
+        "Report memory usage and false positive rate of the blacklisted token "
+        "filter, or size it for a given number of tokens with --capacity."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--capacity",
+            type=int,
+            help="Only compute the size needed for this many tokens, don't load.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=settings.TOKEN_BLACKLIST_FILTER["ERROR_RATE"],
+            help="Target false positive rate used with --capacity.",
+        )
+
+    def handle(self, *args, **options):
+        if options["capacity"]:
+            bits = BloomFilter.optimal_size(options["capacity"], options["error_rate"])
+            stats = {
+                "capacity": options["capacity"],
+                "bits": bits,
+                "hashes": max(1, round(bits / options["capacity"] * math.log(2))),
+                "memory_bytes": math.ceil(bits / 8),
+                "target_false_positive_rate": options["error_rate"],
+            }
+        else:
+            stats = blacklist_filter.stats()
+
+        for name, value in stats.items():
+            self.stdout.write(f"{name:<32}{value}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{'memory_mb':<32}{stats['memory_bytes'] / 2**20:.2f}")
+        )
@@ -0,0 +1,26 @@
+"""django imports"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+"""local imports"""
+from authentication.schema import generate_schema, urlconf_fingerprint, write_artifact
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema once and store it as a gzipped artifact, "
+        "served by schema/ without introspecting the views again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help='Defaults to OPENAPI_SCHEMA["ARTIFACT"].',
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or settings.OPENAPI_SCHEMA["ARTIFACT"]
+
+        write_artifact(path, generate_schema(), urlconf_fingerprint())
+
+        self.stderr.write(self.style.SUCCESS(f"Schema written to {path}."))
@@ -0,0 +1,50 @@
+"""django imports"""
+from django.core.management.base import BaseCommand
+
+"""local imports"""
+from authentication.exports import iter_users, FORMATS
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every user (id, email, username, is_verified, date_joined) as "
+        "NDJSON or CSV, reading the table a page at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(FORMATS),
+            default="ndjson",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write to, defaults to stdout.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Users fetched per query.",
+        )
+
+    def handle(self, *args, **options):
+        lines = FORMATS[options["format"]](iter_users(options["chunk_size"]))
+
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        count = 0
+        with open(options["output"], "w", newline="") as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+
+        if options["format"] == "csv":
+            count -= 1  # header
+
+        self.stderr.write(
+            self.style.SUCCESS(f"Exported {count} users to {options['output']}.")
+        )
@@ -0,0 +1,226 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+"""django imports"""
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+"""local imports"""
+from authentication.models import CustomUser
+from authentication.serializer import ImportUserSerializer
+
+
+def init_worker(settings_module):
+    # spawned (non-forked) pool workers start without django configured
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def hash_password(raw_password):
+    return make_password(raw_password)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk create users from a CSV or JSONL file with columns email, "
+        "username and password or password_hash. Rows are validated with the "
+        "same rules as registration, passwords hashed in a process pool and "
+        "users inserted with chunked bulk_create. Use --checkpoint to resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header row) or JSONL file.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows validated, hashed and inserted per transaction.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes used to hash raw passwords.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="File recording how many rows are done, resumes from it if it exists.",
+        )
+        parser.add_argument(
+            "--errors",
+            help="Write rejected rows and their errors to this JSONL file.",
+        )
+        parser.add_argument(
+            "--verified",
+            action="store_true",
+            help="Mark imported users as having a verified email.",
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        fmt = options["format"] or (
+            "jsonl" if options["path"].endswith((".jsonl", ".ndjson")) else "csv"
+        )
+
+        done = self.read_checkpoint()
+        if done:
+            self.stdout.write(f"Resuming after row {done}.")
+
+        self.counts = {"created": 0, "invalid": 0, "duplicate": 0}
+        started = time.monotonic()
+        errors = open(options["errors"], "a") if options["errors"] else None
+
+        try:
+            with open(options["path"], newline="") as f, ProcessPoolExecutor(
+                max_workers=options["workers"],
+                initializer=init_worker,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", ""),),
+            ) as pool:
+                rows = islice(self.read_rows(f, fmt), done, None)
+
+                while chunk := list(islice(rows, options["chunk_size"])):
+                    rejected = self.import_chunk(chunk, done, pool)
+
+                    done += len(chunk)
+                    self.write_checkpoint(done)
+
+                    if errors:
+                        for error in rejected:
+                            errors.write(json.dumps(error) + "\n")
+
+                    rate = done / max(time.monotonic() - started, 1e-9)
+                    self.stdout.write(
+                        f"{done} rows: {self.counts['created']} created, "
+                        f"{self.counts['duplicate']} duplicate, "
+                        f"{self.counts['invalid']} invalid ({rate:.0f} rows/s)"
+                    )
+        finally:
+            if errors:
+                errors.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Import finished: {self.counts}"))
+
+    def read_rows(self, f, fmt):
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise CommandError(f"Invalid JSON on line {number}: {e}")
+
+    def import_chunk(self, chunk, offset, pool):
+        """Validate, dedupe, hash and insert one chunk, returns rejected rows"""
+
+        valid, rejected = [], []
+
+        for number, row in enumerate(chunk, start=offset + 1):
+            # csv gives "" for empty columns, treat them as missing
+            data = {key: value for key, value in row.items() if value not in ("", None)}
+            serializer = ImportUserSerializer(data=data)
+
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                rejected.append({"row": number, "errors": serializer.errors})
+
+        self.counts["invalid"] += len(rejected)
+
+        # one query per field for the whole chunk, served by the Lower() indexes
+        emails = {data["email"] for _, data in valid}
+        usernames = {data["username"] for _, data in valid}
+        taken_emails = {
+            email.lower()
+            for email in CustomUser.objects.filter(email__lower__in=emails).values_list(
+                "email", flat=True
+            )
+        }
+        taken_usernames = {
+            username.lower()
+            for username in CustomUser.objects.filter(
+                username__lower__in=usernames
+            ).values_list("username", flat=True)
+        }
+
+        users, raw_passwords = [], []
+
+        for number, data in valid:
+            if data["email"] in taken_emails or data["username"] in taken_usernames:
+                self.counts["duplicate"] += 1
+                rejected.append({"row": number, "errors": "User already exists."})
+                continue
+
+            # also catches duplicates within the chunk itself
+            taken_emails.add(data["email"])
+            taken_usernames.add(data["username"])
+
+            user = CustomUser(
+                email=data["email"],
+                username=data["username"],
+                password=data.get("password_hash", ""),
+                is_verified=self.options["verified"],
+            )
+            users.append(user)
+
+            if "password" in data:
+                raw_passwords.append((user, data["password"]))
+
+        # PBKDF2 is the bottleneck, spread it over every core
+        hashed = pool.map(
+            hash_password,
+            [raw for _, raw in raw_passwords],
+            chunksize=max(1, len(raw_passwords) // (self.options["workers"] * 4)),
+        )
+        for (user, _), password in zip(raw_passwords, hashed):
+            user.password = password
+
+        # only the insert runs in a transaction, validation/hashing happen before
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=self.options["chunk_size"])
+
+        self.counts["created"] += len(users)
+
+        return rejected
+
+    def read_checkpoint(self):
+        path = self.options["checkpoint"]
+
+        if not path or not os.path.exists(path):
+            return 0
+
+        with open(path) as f:
+            checkpoint = json.load(f)
+
+        if checkpoint["path"] != os.path.abspath(self.options["path"]):
+            raise CommandError(
+                f"Checkpoint {path} belongs to {checkpoint['path']}, not this file."
+            )
+
+        return checkpoint["rows"]
+
+    def write_checkpoint(self, rows):
+        path = self.options["checkpoint"]
+
+        if not path:
+            return
+
+        # write then rename so a crash never leaves a half written checkpoint
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"path": os.path.abspath(self.options["path"]), "rows": rows}, f)
+        os.replace(f"{path}.tmp", path)
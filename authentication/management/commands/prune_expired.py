@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+
+"""django imports"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+"""third party imports"""
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+"""local imports"""
+from authentication.models import EmailOutbox, OneTimeCode
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired verification/reset codes, outstanding JWTs (their "
+        "BlacklistedToken rows cascade) and delivered or failed outbox emails "
+        "in small keyset batches."
+    )
+
+    models = {
+        "codes": [OneTimeCode],
+        "tokens": [OutstandingToken],
+        "outbox": [EmailOutbox],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to pause between batches to let replication/vacuum catch up.",
+        )
+        parser.add_argument(
+            "--only",
+            choices=sorted(self.models),
+            help="Only prune codes, tokens or outbox emails.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many rows would be deleted without deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now()
+        groups = [options["only"]] if options["only"] else sorted(self.models)
+
+        for group in groups:
+            for model in self.models[group]:
+                total = self.prune(model, cutoff, **options)
+                verb = "Would delete" if options["dry_run"] else "Deleted"
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{verb} {total} expired {model._meta.label} rows."
+                    )
+                )
+
+    def expired(self, model, cutoff):
+        if model is EmailOutbox:
+            # done with, pending ones are still being retried
+            retention = timedelta(hours=settings.EMAIL_OUTBOX["RETENTION_HOURS"])
+            return model.objects.filter(
+                status__in=[EmailOutbox.Status.SENT, EmailOutbox.Status.FAILED],
+                created_at__lt=cutoff - retention,
+            )
+
+        return model.objects.filter(expires_at__lt=cutoff)
+
+    def prune(self, model, cutoff, batch_size, sleep, dry_run, **options):
+        """
+        Walk expired rows by primary key so every batch is a short index range
+        scan and a short delete, instead of one huge long-running DELETE
+        """
+
+        expired = self.expired(model, cutoff).order_by("pk")
+        last_pk = None
+        total = 0
+
+        while True:
+            batch = expired if last_pk is None else expired.filter(pk__gt=last_pk)
+            pks = list(batch.values_list("pk", flat=True)[:batch_size])
+
+            if not pks:
+                break
+
+            last_pk = pks[-1]
+            total += len(pks)
+
+            if not dry_run:
+                model.objects.filter(pk__in=pks).delete()
+
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{model._meta.label}: {total} rows so far")
+
+            if len(pks) < batch_size:
+                break
+
+            time.sleep(sleep)
+
+        return total
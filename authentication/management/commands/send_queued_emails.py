@@ -0,0 +1,168 @@
+import random
+import time
+from datetime import timedelta
+
+"""django imports"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+"""local imports"""
+from authentication.models import EmailOutbox
+from authentication.uitls import EmailProviderUnavailable
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued verification/reset emails from the outbox in batches, "
+        "retrying failed sends with exponential backoff."
+    )
+
+    # added to the lease for the batch's own queries
+    lease_margin = timedelta(seconds=30)
+
+    def add_arguments(self, parser):
+        config = settings.EMAIL_OUTBOX
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=config["BATCH_SIZE"],
+            help="Number of messages claimed per batch.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=config["MAX_ATTEMPTS"],
+            help="Give up on a message after this many failed sends.",
+        )
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=config["BACKOFF_SECONDS"],
+            help="Base delay in seconds before retrying, doubled every attempt.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=config["POLL_INTERVAL"],
+            help="Seconds to sleep when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain whatever is due and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        self.transport = import_string(settings.EMAIL_OUTBOX["TRANSPORT"])
+        self.batch_size = options["batch_size"]
+        self.max_attempts = options["max_attempts"]
+        self.backoff = options["backoff"]
+
+        # a claimed batch stays invisible to other workers until every message
+        # could have hit both timeouts, or they would send the same codes again
+        delivery = settings.EMAIL_DELIVERY
+        per_message = delivery.get("CONNECT_TIMEOUT", 2) + delivery.get(
+            "READ_TIMEOUT", 5
+        )
+        self.lease = (
+            timedelta(seconds=self.batch_size * per_message) + self.lease_margin
+        )
+
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = self.drain_batch()
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                self.stdout.write(f"Batch done: {sent} sent, {failed} failed.")
+                continue
+
+            if options["once"]:
+                break
+
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Outbox drained: {total_sent} sent, {total_failed} failed."
+            )
+        )
+
+    def claim_batch(self):
+        """
+        Lease a batch of due messages so concurrent workers skip them,
+        a crashed worker's lease simply expires and the messages are retried
+        """
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            ids = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now
+                )
+                .order_by("next_attempt_at", "pk")
+                .values_list("pk", flat=True)[: self.batch_size]
+            )
+            EmailOutbox.objects.filter(pk__in=ids).update(
+                next_attempt_at=now + self.lease
+            )
+
+        return list(EmailOutbox.objects.filter(pk__in=ids).order_by("pk"))
+
+    def drain_batch(self):
+        """Send one batch, returns (sent, failed) counts"""
+
+        messages = self.claim_batch()
+        sent = failed = 0
+
+        for index, message in enumerate(messages):
+            try:
+                delivered = self.transport(code=message.code, email=message.email)
+                error = "" if delivered else "Transport reported failure."
+            except EmailProviderUnavailable as e:
+                # nothing was sent so it's no attempt, the rest of the batch
+                # waits until the circuit lets a trial call through
+                retry_at = timezone.now() + timedelta(seconds=e.retry_after)
+                for deferred in messages[index:]:
+                    deferred.next_attempt_at = retry_at
+                    deferred.last_error = str(e)
+                break
+            except Exception as e:
+                delivered = False
+                error = str(e) or e.__class__.__name__
+
+            message.attempts += 1
+
+            if delivered:
+                message.status = EmailOutbox.Status.SENT
+                message.sent_at = timezone.now()
+                message.last_error = ""
+                sent += 1
+                continue
+
+            message.last_error = error
+            failed += 1
+
+            if message.attempts >= self.max_attempts:
+                message.status = EmailOutbox.Status.FAILED
+            else:
+                # exponential backoff with jitter so retries don't stampede
+                delay = self.backoff * 2 ** (message.attempts - 1)
+                message.next_attempt_at = timezone.now() + timedelta(
+                    seconds=delay * random.uniform(1, 1.25)
+                )
+
+        EmailOutbox.objects.bulk_update(
+            messages,
+            ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+        )
+
+        return sent, failed
@@ -0,0 +1,314 @@
+"""
+Counters and histograms for auth traffic, aggregated across worker processes
+
+Every process writes its own mmap'd file (<pid>.db) in METRICS["DIRECTORY"],
+so gunicorn workers never wait on each other, and `render()` sums all of
+the files into the Prometheus text exposition format for the /metrics/ view.
+
+Files of exited workers are kept so their counts aren't lost, empty the
+directory before (re)starting the server.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+
+"""django imports"""
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = {}  # metric name -> Counter/Histogram, in declaration order
+
+_HEADER_SIZE = 8  # bytes used (uint32) + padding
+_INITIAL_SIZE = 64 * 1024
+
+
+class MmapStore:
+    """
+    One process' samples, key -> float64, in a file that only grows
+
+    Entries are a uint32 key length, the utf-8 key padded to 8 bytes and the
+    value. The header holding the bytes used is written last, so readers never
+    see half written entries.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_SIZE)
+
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = struct.unpack_from("I", self._map, 0)[0] or _HEADER_SIZE
+        self._positions = {
+            key: position for key, _, position in read_entries(self._map, self._used)
+        }
+
+    def add(self, items):
+        """Add each (key, amount) pair under a single lock"""
+
+        with self._lock:
+            for key, amount in items:
+                position = self._positions.get(key)
+
+                if position is None:
+                    position = self._append(key)
+
+                (value,) = struct.unpack_from("d", self._map, position)
+                struct.pack_into("d", self._map, position, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padding = (8 - (4 + len(encoded)) % 8) % 8
+        size = 4 + len(encoded) + padding + 8
+
+        while self._used + size > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+
+        struct.pack_into(
+            f"I{len(encoded)}s{padding}xd",
+            self._map,
+            self._used,
+            len(encoded),
+            encoded,
+            0.0,
+        )
+        position = self._used + size - 8
+
+        self._used += size
+        struct.pack_into("I", self._map, 0, self._used)
+        self._positions[key] = position
+
+        return position
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def read_entries(data, used=None):
+    """Yield (key, value, position) from the bytes of one process file"""
+
+    if used is None:
+        used = struct.unpack_from("I", data, 0)[0] if len(data) >= 4 else 0
+
+    position = _HEADER_SIZE
+    while position < used:
+        (length,) = struct.unpack_from("I", data, position)
+        key = bytes(data[position + 4 : position + 4 + length]).decode()
+        position += 4 + length + (8 - (4 + length) % 8) % 8
+        (value,) = struct.unpack_from("d", data, position)
+
+        yield key, value, position
+        position += 8
+
+
+_process = None  # (pid, MmapStore) of the current process
+
+
+def _get_store():
+    global _process
+
+    pid = os.getpid()
+
+    # a forked worker must not write to its parent's file
+    if _process is None or _process[0] != pid:
+        directory = settings.METRICS["DIRECTORY"]
+        os.makedirs(directory, exist_ok=True)
+        _process = (pid, MmapStore(os.path.join(directory, f"{pid}.db")))
+
+    return _process[1]
+
+
+@receiver(setting_changed)
+def reset_store(setting, **kwargs):
+    global _process
+
+    if setting == "METRICS" and _process is not None:
+        _process[1].close()
+        _process = None
+
+
+def _add(items):
+    if settings.METRICS["ENABLED"]:
+        _get_store().add(items)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+
+        REGISTRY[name] = self
+
+    def _key(self, sample, labels):
+        """Store key for a sample, cached as only a handful of label sets exist"""
+
+        cache_key = (sample, tuple(sorted(labels.items())))
+        key = self._keys.get(cache_key)
+
+        if key is None:
+            if set(labels) - {"le"} != set(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+            key = self._keys[cache_key] = json.dumps(
+                [self.name, sample, dict(cache_key[1])]
+            )
+
+        return key
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        _add([(self._key(self.name, labels), amount)])
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        # one bucket per observation, render() makes them cumulative
+        bucket = self.buckets[bisect_left(self.buckets, value)]
+
+        _add(
+            [
+                (self._key(f"{self.name}_bucket", {**labels, "le": bucket}), 1),
+                (self._key(f"{self.name}_sum", labels), value),
+                (self._key(f"{self.name}_count", labels), 1),
+            ]
+        )
+
+
+def collect():
+    """Sum the samples of every process file, {key: value}"""
+
+    totals = {}
+
+    for path in glob.glob(os.path.join(settings.METRICS["DIRECTORY"], "*.db")):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        for key, value, _ in read_entries(data):
+            totals[key] = totals.get(key, 0.0) + value
+
+    return totals
+
+
+def render():
+    """Text exposition of every registered metric"""
+
+    samples = {}
+    for key, value in collect().items():
+        name, sample, labels = json.loads(key)
+        samples.setdefault(name, []).append((sample, labels, value))
+
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.type}")
+
+        rows = samples.get(name, [])
+        if metric.type == "histogram":
+            rows = _cumulative_buckets(metric, rows)
+
+        for sample, labels, value in sorted(rows, key=_sort_key):
+            lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _cumulative_buckets(metric, rows):
+    buckets = {}
+    others = []
+
+    for sample, labels, value in rows:
+        if sample.endswith("_bucket"):
+            series = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+            buckets.setdefault(series, {})[labels["le"]] = value
+        else:
+            others.append((sample, labels, value))
+
+    for series, counts in buckets.items():
+        total = 0.0
+        for bound in metric.buckets:
+            total += counts.get(bound, 0.0)
+            others.append(
+                (f"{metric.name}_bucket", {**dict(series), "le": bound}, total)
+            )
+
+    return others
+
+
+def _sort_key(row):
+    sample, labels, _ = row
+    return (
+        sample,
+        sorted((k, v) for k, v in labels.items() if k != "le"),
+        labels.get("le", 0),
+    )
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+
+    pairs = []
+    for name, value in labels.items():
+        if name == "le":
+            value = "+Inf" if value == float("inf") else _format_value(value)
+        value = str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+        pairs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# --- auth metrics ---
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling requests, per url name",
+    ["view", "method"],
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests handled, per url name and status code",
+    ["view", "method", "status"],
+)
+LOGINS = Counter("auth_logins_total", "Login attempts", ["outcome"])
+REGISTRATIONS = Counter("auth_registrations_total", "Accounts created")
+CODES_ISSUED = Counter(
+    "auth_codes_issued_total", "One-time codes issued and queued for email", ["purpose"]
+)
+CODE_VERIFICATIONS = Counter(
+    "auth_code_verifications_total",
+    "One-time code checks",
+    ["purpose", "outcome"],
+)
@@ -0,0 +1,138 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+"""django imports"""
+from django.conf import settings
+from django.db import connections
+
+"""local imports"""
+from . import instrumentation, metrics, routers
+
+logger = logging.getLogger("authentication.performance")
+
+# any other request method is counted as "other", clients can send anything
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class PerformanceTimingMiddleware:
+    """
+    Records query count, db time, password hashing, email and render time for
+    a sample of requests (PERFORMANCE_TIMING["SAMPLE_RATE"]), returns them in
+    a Server-Timing header and logs them as one JSON line.
+
+    Keep it first in MIDDLEWARE so `total` covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.PERFORMANCE_TIMING
+
+        if random.random() >= config["SAMPLE_RATE"]:
+            return self.get_response(request)
+
+        timings, token = instrumentation.start()
+        request._timings = timings
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.db_wrapper))
+
+                start = time.perf_counter()
+                response = self.get_response(request)
+                total = (time.perf_counter() - start) * 1000
+        finally:
+            instrumentation.stop(token)
+
+        if config["HEADER"]:
+            response["Server-Timing"] = timings.server_timing(total)
+
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    **timings.as_dict(total),
+                }
+            )
+        )
+
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook, time it through
+        # a post-render callback
+        timings = getattr(request, "_timings", None)
+
+        if timings is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add(
+                    "render", (time.perf_counter() - start) * 1000
+                )
+            )
+
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Latency histogram and request counter per url name, see
+    authentication/metrics.py. Requests that didn't match a url are
+    grouped under "unmatched" and unknown methods under "other" so scanners
+    can't blow up the label count.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        method = request.method if request.method in HTTP_METHODS else "other"
+
+        metrics.REQUEST_LATENCY.observe(elapsed, view=view, method=method)
+        metrics.REQUESTS.inc(view=view, method=method, status=str(response.status_code))
+
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Tracks writes for authentication.routers.ReplicaRouter: a request carrying
+    the pin cookie reads from the primary, and a request that wrote sets the
+    cookie so the client's next requests see their own writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = routers.start_request(pinned=routers.PIN_COOKIE in request.COOKIES)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            state = routers.end_request(token)
+
+        if state.wrote and settings.READ_REPLICAS["ALIASES"]:
+            response.set_cookie(
+                routers.PIN_COOKIE,
+                "1",
+                max_age=settings.READ_REPLICAS["PIN_SECONDS"],
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:47
+
+import authentication.models
+import django.core.validators
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def check_case_duplicates(apps, schema_editor):
+    # the Lower() constraints can't be built while users differing only in
+    # case exist, name them instead of failing on the index creation
+    CustomUser = apps.get_model('authentication', 'CustomUser')
+    duplicates = []
+
+    for field in ('email', 'username'):
+        values = (
+            CustomUser.objects.using(schema_editor.connection.alias)
+            .values(value=django.db.models.functions.text.Lower(field))
+            .annotate(count=models.Count('pk'))
+            .filter(count__gt=1)
+            .values_list('value', 'count')
+        )
+        duplicates += [f'{field} {value!r} ({count} users)' for value, count in values]
+
+    if duplicates:
+        raise ValueError(
+            'Users differing only in case must be merged or renamed before '
+            'migrating:\n' + '\n'.join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0002_email_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', authentication.models.CustomUserManager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='unique_email_ci', violation_error_message='User with this email already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='unique_username_ci', violation_error_message='User with this username already exists.'),
+        ),
+        # the case-sensitive unique indexes are redundant with the above
+        migrations.AlterField(
+            model_name='customuser',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='username',
+            field=models.CharField(max_length=12, validators=[django.core.validators.RegexValidator(message='Only letters, numbers, underscores and dots are allowed.', regex='^[a-zA-Z0-9_.]+$')]),
+        ),
+    ]
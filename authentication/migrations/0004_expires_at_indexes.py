@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:49
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    # CREATE INDEX CONCURRENTLY so the code tables aren't write-locked while
+    # it builds, other databases don't have it and get a plain CREATE INDEX
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            operation = super()
+        else:
+            operation = super(AddIndexConcurrently, self)
+        operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            operation = super()
+        else:
+            operation = super(AddIndexConcurrently, self)
+        operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def expires_at_index(model_name, name):
+    # the models declare db_index=True on expires_at, the index is created
+    # here under the name Django gives it and only the field changes in the
+    # migration state
+    return migrations.SeparateDatabaseAndState(
+        database_operations=[
+            AddIndexConcurrentlyOnPostgres(
+                model_name=model_name,
+                index=models.Index(fields=['expires_at'], name=name),
+            ),
+        ],
+        state_operations=[
+            migrations.AlterField(
+                model_name=model_name,
+                name='expires_at',
+                field=models.DateTimeField(db_index=True),
+            ),
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0003_case_insensitive_email_username'),
+    ]
+
+    operations = [
+        expires_at_index(
+            'emailverificationmodel',
+            'authentication_emailverificationmodel_expires_at_fb97e9ed',
+        ),
+        expires_at_index(
+            'passwordresetcodemodel',
+            'authentication_passwordresetcodemodel_expires_at_fe66037d',
+        ),
+    ]
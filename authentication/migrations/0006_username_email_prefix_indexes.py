@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+# (index name, column) pairs for LOWER(column) LIKE 'prefix%' searches
+INDEXES = [
+    ("authentication_customuser_email_lower_prefix", "email"),
+    ("authentication_customuser_username_lower_prefix", "username"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    # Postgres can't use the Lower() unique indexes for LIKE unless the
+    # collation is C, pattern_ops indexes cover the admin's prefix search.
+    # Other databases don't have operator classes, nothing to do there.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+            f'ON "authentication_customuser" (LOWER("{column}") varchar_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0005_outstandingtoken_expires_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,92 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# old per-purpose tables -> OneTimeCode.purpose
+PURPOSES = {
+    'EmailVerificationModel': 'verify_email',
+    'PasswordResetCodeModel': 'reset_password',
+}
+BATCH_SIZE = 1000
+
+
+def copy_codes(apps, schema_editor):
+    OneTimeCode = apps.get_model('authentication', 'OneTimeCode')
+    db = schema_editor.connection.alias
+
+    for model_name, purpose in PURPOSES.items():
+        model = apps.get_model('authentication', model_name)
+        # newest row first per user, the older ones were already superseded
+        rows = model.objects.using(db).order_by('user_id', '-pk').values(
+            'user_id', 'code', 'created_at', 'expires_at'
+        )
+        last_user_id = None
+        batch = []
+
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            if row['user_id'] == last_user_id:
+                continue
+
+            last_user_id = row['user_id']
+            batch.append(OneTimeCode(purpose=purpose, **row))
+
+            if len(batch) >= BATCH_SIZE:
+                OneTimeCode.objects.using(db).bulk_create(batch)
+                batch = []
+
+        OneTimeCode.objects.using(db).bulk_create(batch)
+
+
+def split_codes(apps, schema_editor):
+    OneTimeCode = apps.get_model('authentication', 'OneTimeCode')
+    db = schema_editor.connection.alias
+
+    for model_name, purpose in PURPOSES.items():
+        model = apps.get_model('authentication', model_name)
+        # keep the copied created_at, the historical model is ours to change
+        model._meta.get_field('created_at').auto_now_add = False
+        rows = OneTimeCode.objects.using(db).filter(purpose=purpose).values(
+            'user_id', 'code', 'created_at', 'expires_at'
+        )
+        model.objects.using(db).bulk_create(
+            (model(**row) for row in rows.iterator(chunk_size=BATCH_SIZE)),
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0006_username_email_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OneTimeCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('verify_email', 'Email verification'), ('reset_password', 'Password reset')], max_length=14)),
+                ('code', models.IntegerField(null=True)),
+                # auto_now_add once the old timestamps are copied
+                ('created_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'purpose'), name='unique_code_per_user_purpose')],
+            },
+        ),
+        migrations.RunPython(copy_codes, split_codes),
+        migrations.AlterField(
+            model_name='onetimecode',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.DeleteModel(
+            name='EmailVerificationModel',
+        ),
+        migrations.DeleteModel(
+            name='PasswordResetCodeModel',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_one_time_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+INDEX_NAME = "token_blacklist_blacklistedtoken_blacklisted_at"
+
+
+def create_index(apps, schema_editor):
+    # simplejwt doesn't index BlacklistedToken.blacklisted_at, the blacklist
+    # filter's incremental sync needs it. Built concurrently on postgres so a
+    # large blacklist isn't write-locked.
+    concurrently = "CONCURRENTLY " if schema_editor.connection.vendor == "postgresql" else ""
+    schema_editor.execute(
+        f'CREATE INDEX {concurrently}IF NOT EXISTS "{INDEX_NAME}" '
+        'ON "token_blacklist_blacklistedtoken" ("blacklisted_at")'
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('authentication', '0008_customuser_version'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
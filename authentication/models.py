@@ -1,14 +1,46 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import models, transaction
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import RegexValidator
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.utils import timezone
 from datetime import timedelta
 
+from .instrumentation import timed
+
+
+class CustomUserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        from .authentication import invalidate_cached_users
+
+        # bulk updates bump the version too, see CustomUser.save()
+        kwargs.setdefault("version", F("version") + 1)
+        rows = super().update(**kwargs)
+        # and send no post_save (see signals.py), which users matched isn't
+        # known without another query, so every cached user goes once committed
+        transaction.on_commit(invalidate_cached_users, using=self.db)
+
+        return rows
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    def get_by_natural_key(self, email):
+        return self.get_by_email(email)
+
+    def get_by_email(self, email):
+        """Case-insensitive lookup served by the Lower("email") unique index"""
+
+        if isinstance(email, str):
+            email = email.lower()
+
+        return self.get(email__lower=email)
+
 
 class CustomUser(AbstractUser):
-    email = models.EmailField(unique=True)
+    # unique through the case-insensitive constraints in Meta, which would
+    # make plain unique indexes redundant (hence auth.E003 being silenced)
+    email = models.EmailField()
     username = models.CharField(
-        unique=True,
         max_length=12,
         validators=[
             RegexValidator(
@@ -18,49 +50,132 @@ class CustomUser(AbstractUser):
         ],
     )
     is_verified = models.BooleanField(default=False)
+    # bumped on every write, auth/me/'s ETag is derived from it
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"  # now use email to login
     REQUIRED_FIELDS = ["username"]  # required when creating superuser
 
+    objects = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        # case-insensitive uniqueness enforced by the db, query with
+        # `email__lower=` / `username__lower=` so lookups can use these indexes
+        constraints = [
+            models.UniqueConstraint(
+                Lower("email"),
+                name="unique_email_ci",
+                violation_error_message="User with this email already exists.",
+            ),
+            models.UniqueConstraint(
+                Lower("username"),
+                name="unique_username_ci",
+                violation_error_message="User with this username already exists.",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+
+        # an empty update_fields saves nothing, nothing to bump
+        if update_fields is None or update_fields:
+            if self._state.adding:
+                self.version += 1
+            else:
+                # incremented by the db so concurrent saves can't lose a bump
+                self.version = F("version") + 1
+
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            if isinstance(self.__dict__.get("version"), models.Expression):
+                # deferred, the new value is read from the db on next access
+                del self.version
+
+    # password hashing shows up as `hash` in the Server-Timing header
+    def set_password(self, raw_password):
+        with timed("hash"):
+            super().set_password(raw_password)
+
+    def check_password(self, raw_password):
+        with timed("hash"):
+            return super().check_password(raw_password)
+
     def __str__(self):
         return f"User with username: {self.username} and email: {self.email}"
 
 
-class EmailVerificationModel(models.Model):
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+class OneTimeCode(models.Model):
+    """
+    The current email verification or password reset code of a user, one row
+    per (user, purpose) that is overwritten when a new code is issued
+    """
+
+    class Purpose(models.TextChoices):
+        VERIFY_EMAIL = "verify_email", "Email verification"
+        RESET_PASSWORD = "reset_password", "Password reset"
+
+    # the (user, purpose) unique index serves user lookups, no separate index
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
+    purpose = models.CharField(max_length=14, choices=Purpose.choices)
     code = models.IntegerField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    expires_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)  # for prune_expired
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "purpose"], name="unique_code_per_user_purpose"
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.pk:
+        if not self.pk and self.expires_at is None:
             self.expires_at = timezone.now() + timedelta(minutes=15)
 
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"Verification for {self.user.username}"
+        return f"{self.get_purpose_display()} for {self.user.username}"
 
     @property
     def is_expired(self):
         return timezone.now() >= self.expires_at
 
 
-class PasswordResetCodeModel(models.Model):
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    code = models.IntegerField(null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    expires_at = models.DateTimeField()
+class EmailOutbox(models.Model):
+    """
+    Verification/reset emails waiting to be delivered by the
+    `send_queued_emails` worker, written in the same transaction as the code
+    """
 
-    def save(self, *args, **kwargs):
-        if not self.pk:
-            self.expires_at = timezone.now() + timedelta(minutes=15)
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
 
-        super().save(*args, **kwargs)
+    email = models.EmailField()
+    code = models.CharField(max_length=6)
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
-    def __str__(self):
-        return f"Password reset for {self.user.username}"
+    class Meta:
+        indexes = [
+            # the worker only ever polls for due pending messages
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outbox_status_next_attempt",
+            ),
+        ]
 
-    @property
-    def is_expired(self):
-        return timezone.now() >= self.expires_at
+    def __str__(self):
+        return f"Email to {self.email} ({self.status})"
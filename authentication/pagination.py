@@ -0,0 +1,40 @@
+"""django imports"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables
+
+    On Postgres an unfiltered queryset is counted from the planner's row
+    estimate (pg_class.reltuples) instead of a full COUNT(*) scan, once the
+    table is past `threshold` rows. Filtered querysets (searches, list
+    filters) and other databases still get an exact count.
+    """
+
+    threshold = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+
+        if (
+            isinstance(queryset, QuerySet)
+            and not queryset.query.where
+            and connections[queryset.db].vendor == "postgresql"
+        ):
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+
+            # -1 means the table was never analyzed
+            if row and row[0] >= self.threshold:
+                return row[0]
+
+        return super().count
@@ -0,0 +1,40 @@
+import io
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+"""drf imports"""
+from rest_framework.parsers import JSONParser
+
+"""django imports"""
+from django.conf import settings
+
+"""local imports"""
+from .renderers import FastJSONRenderer
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser on top of orjson for utf-8 bodies
+
+    Anything orjson rejects is parsed again by JSONParser, so invalid bodies
+    get the exact same ParseError and STRICT_JSON=False still accepts NaN.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
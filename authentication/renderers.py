@@ -0,0 +1,118 @@
+import csv
+import decimal
+import io
+import math
+import re
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+"""drf imports"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+# a float orjson wrote with an exponent, 1e16 where json writes 1e+16
+EXPONENT = re.compile(rb"\de-?\d")
+
+
+def has_non_finite(data):
+    """True if data holds a NaN or infinity, orjson writes those as null"""
+
+    stack = [data]
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, decimal.Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on top of orjson, byte for byte the same output
+
+    Types orjson doesn't know (Decimal, lazy strings, querysets...) and
+    datetimes, which DRF trims to milliseconds, go through DRF's own encoder.
+    Indented or ASCII-only output, payloads orjson refuses (ints over 64
+    bits) and installs without orjson use JSONRenderer. So do floats orjson
+    formats differently (exponents) and NaN/infinity, which then raise
+    ValueError with STRICT_JSON like they do with JSONRenderer.
+    """
+
+    if orjson is not None:
+        options = (
+            orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_NON_STR_KEYS
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # both checks are scans in C unless the output has a null
+        if EXPONENT.search(ret) or (b"null" in ret and has_non_finite(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escaped like JSONRenderer does, so the output is a strict js subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Lets views negotiate `?format=ndjson` / `Accept: application/x-ndjson`,
+    streamed bodies bypass it, anything else (errors) is one JSON line
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Lets views negotiate `?format=csv` / `Accept: text/csv`, streamed bodies
+    bypass it, anything else (errors) is rendered as key,value rows
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        items = data.items() if isinstance(data, dict) else [("detail", data)]
+
+        for key, value in items:
+            writer.writerow([key, value])
+
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,108 @@
+"""
+Read replica routing
+
+Reads go to a healthy replica from READ_REPLICAS["ALIASES"], writes to the
+primary ("default"). So that nobody reads stale data right after writing:
+
+- within a request (ReplicaPinningMiddleware) the first write pins the rest
+  of it to the primary, and a short lived cookie pins the client's next
+  requests for READ_REPLICAS["PIN_SECONDS"], register -> verify stays
+  consistent
+- reads inside transaction.atomic() use the primary
+- outside requests (management commands, workers) everything uses the primary
+
+A replica that can't be connected to is skipped for
+READ_REPLICAS["HEALTH_CHECK_INTERVAL"] seconds.
+"""
+
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+"""django imports"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = DEFAULT_DB_ALIAS
+PIN_COOKIE = "primary_pin"
+
+_state = ContextVar("replica_routing", default=None)
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def start_request(pinned=False):
+    return _state.set(RoutingState(pinned))
+
+
+def end_request(token):
+    """Forget the request's state, returns it"""
+
+    state = _state.get()
+    _state.reset(token)
+
+    return state
+
+
+_health = {}  # alias -> (healthy, monotonic time checked)
+
+
+def is_healthy(alias):
+    healthy, checked_at = _health.get(alias, (None, 0.0))
+    now = time.monotonic()
+
+    if (
+        healthy is None
+        or now - checked_at >= settings.READ_REPLICAS["HEALTH_CHECK_INTERVAL"]
+    ):
+        connection = connections[alias]
+
+        try:
+            if connection.connection is not None and not connection.is_usable():
+                connection.close()
+            connection.ensure_connection()
+            healthy = True
+        except DatabaseError:
+            logger.warning("Read replica %s is unavailable", alias, exc_info=True)
+            healthy = False
+
+        _health[alias] = (healthy, now)
+
+    return healthy
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+
+        if state is None or state.pinned or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+
+        replicas = [
+            alias for alias in settings.READ_REPLICAS["ALIASES"] if is_healthy(alias)
+        ]
+
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+
+        if state is not None:
+            state.pinned = state.wrote = True
+
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema through replication
+        return db not in settings.READ_REPLICAS["ALIASES"]
@@ -0,0 +1,184 @@
+"""
+OpenAPI schema generated once per process instead of on every request
+
+drf-spectacular introspects every view and serializer each time schema/ is
+hit. CachedSchemaView builds the schema once, either from the artifact
+written by `python manage.py build_schema` or on the first request, and
+keeps every rendered format in memory, gzipped and with an ETag.
+
+Both the artifact and the in-memory copy are tagged with a fingerprint of
+the url conf, a stale artifact is ignored and regenerated.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+
+"""drf imports"""
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from drf_spectacular.settings import spectacular_settings
+
+"""django imports"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+logger = logging.getLogger(__name__)
+
+
+def urlconf_fingerprint(urlconf=None):
+    """Hash of every route and the view it points to"""
+
+    def walk(patterns, prefix=""):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns, route)
+            elif isinstance(pattern, URLPattern):
+                view = getattr(pattern.callback, "cls", pattern.callback)
+                yield f"{route} {view.__module__}.{view.__qualname__} {pattern.name}"
+
+    digest = hashlib.sha256()
+    for line in walk(get_resolver(urlconf).url_patterns):
+        digest.update(line.encode() + b"\n")
+
+    return digest.hexdigest()[:16]
+
+
+def generate_schema():
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def write_artifact(path, schema, fingerprint):
+    """gzipped {"fingerprint", "schema"} json, replaced atomically"""
+
+    data = json.dumps(
+        {"fingerprint": fingerprint, "schema": schema}, cls=DjangoJSONEncoder
+    )
+
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path, fingerprint):
+    """Schema stored at path, None if missing or built for another url conf"""
+
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if data["fingerprint"] != fingerprint:
+        logger.warning(
+            "OpenAPI schema artifact %s is stale, run `manage.py build_schema`", path
+        )
+        return None
+
+    return data["schema"]
+
+
+class RenderedSchema:
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9)
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.gzip_etag = f'"{self.etag[1:-1]}-gzip"'
+
+
+class SchemaCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.resolver = None
+        self.fingerprint = None
+        self.schema = None
+        self.rendered = {}  # media type -> RenderedSchema
+
+    def get(self, renderer):
+        # get_resolver() is cached until the url conf changes, only then is
+        # the fingerprint worth recomputing
+        resolver = get_resolver()
+
+        with self._lock:
+            if resolver is not self.resolver:
+                fingerprint = urlconf_fingerprint()
+
+                if fingerprint != self.fingerprint:
+                    self.reset()
+                    self.schema = read_artifact(
+                        settings.OPENAPI_SCHEMA["ARTIFACT"], fingerprint
+                    )
+                    if self.schema is None:
+                        self.schema = generate_schema()
+                    self.fingerprint = fingerprint
+
+                self.resolver = resolver
+
+            rendered = self.rendered.get(renderer.media_type)
+            if rendered is None:
+                rendered = self.rendered[renderer.media_type] = RenderedSchema(
+                    renderer.render(self.schema, renderer_context={})
+                )
+
+        return rendered
+
+
+schema_cache = SchemaCache()
+
+
+@receiver(setting_changed)
+def reset_schema_cache(setting, **kwargs):
+    if setting in ("OPENAPI_SCHEMA", "SPECTACULAR_SETTINGS", "ROOT_URLCONF"):
+        schema_cache.reset()
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """
+    SpectacularAPIView served from SchemaCache, with If-None-Match support
+    and gzip for clients that accept it. Only the public schema of the default
+    url conf is served, `?version=` and `?lang=` are ignored.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        rendered = schema_cache.get(renderer)
+        use_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+        etag = rendered.gzip_etag if use_gzip else rendered.etag
+
+        if_none_match = set(parse_etags(request.headers.get("If-None-Match", "")))
+        if if_none_match & {"*", rendered.etag, rendered.gzip_etag}:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                rendered.gzipped if use_gzip else rendered.body,
+                content_type=renderer.media_type,
+            )
+            response["Content-Disposition"] = (
+                f'inline; filename="{spectacular_settings.TITLE.strip() or "schema"}'
+                f'.{renderer.format}"'
+            )
+            if use_gzip:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ["Accept", "Accept-Encoding"])
+
+        return response
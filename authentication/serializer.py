@@ -2,28 +2,48 @@ import re
 
 """drf imports"""
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+    TokenBlacklistSerializer,
+)
 from rest_framework.validators import UniqueValidator
 
 """django imports"""
-from django.contrib.auth import authenticate
+from django.db import IntegrityError
+from django.db.models import Q
 from django.core.validators import RegexValidator
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.hashers import identify_hasher
 
 """local imports """
 from .models import CustomUser
+from .tokens import UserRefreshToken
 
 
 class RegisterSerializer(serializers.ModelSerializer):
+    """
+    Uniqueness isn't checked during validation. create() looks up both fields
+    in one query, served by the Lower() indexes, before spending a password
+    hash, then inserts and maps a violation of the case-insensitive unique
+    constraints back to a field error for signups racing past that check.
+    """
+
+    # the constraint each database names when reporting a duplicate
+    UNIQUE_VIOLATIONS = {"email": "unique_email_ci", "username": "unique_username_ci"}
+
     class Meta:
         model = CustomUser
         fields = ["email", "username", "password"]
         extra_kwargs = {
             "password": {"write_only": True},
+            # checked by the database on insert instead of UniqueValidator queries
+            "email": {"validators": []},
             "username": {
+                "validators": [],
                 "error_messages": {
                     "max_length": "Username must be between 3 and 8 characters long."
-                }
+                },
             },
         }
 
@@ -52,31 +72,106 @@ class RegisterSerializer(serializers.ModelSerializer):
                 "Username must be between 3 to 8 characters long."
             )
 
-        # Uniqueness check (case-insensitive)
-        if CustomUser.objects.filter(username__iexact=username).exists():
-            raise serializers.ValidationError("User with this username already exists.")
-
         return username
 
     def validate_email(self, value):
         # Normalize to lowercase
-        email = value.lower()
-
-        # Uniqueness check (case-insensitive)
-        if CustomUser.objects.filter(email__iexact=email).exists():
-            raise serializers.ValidationError("User with this email already exists.")
-
-        return email
+        return value.lower()
 
     # over riding create so password gets hashed b4 saving in db
     def create(self, validated_data):
+        taken = self.taken_fields(validated_data["email"], validated_data["username"])
+        if taken:
+            raise serializers.ValidationError(
+                {field: [self.unique_message(field)] for field in taken}
+            )
+
         user = CustomUser(
             email=validated_data["email"], username=validated_data["username"]
         )
         user.set_password(validated_data["password"])  # hashes the password
-        user.save()
+
+        # no savepoint, on a duplicate the caller's transaction is rolled back
+        # by the ValidationError leaving it
+        try:
+            user.save(force_insert=True)
+        except IntegrityError as e:
+            field = self.unique_violation(e)
+            if field is None:
+                raise
+            raise serializers.ValidationError({field: [self.unique_message(field)]})
+
         return user
 
+    @staticmethod
+    def taken_fields(email, username):
+        """Which of email/username already belong to a user, case-insensitively"""
+
+        taken = set()
+        for user_email, user_username in CustomUser.objects.filter(
+            Q(email__lower=email.lower()) | Q(username__lower=username.lower())
+        ).values_list("email", "username")[:2]:
+            if user_email.lower() == email.lower():
+                taken.add("email")
+            if user_username.lower() == username.lower():
+                taken.add("username")
+
+        return sorted(taken)
+
+    @classmethod
+    def unique_violation(cls, error):
+        """Field whose unique constraint `error` is about, None if unknown"""
+
+        diag = getattr(error.__cause__, "diag", None)
+        message = getattr(diag, "constraint_name", None) or str(error)
+
+        for field, name in cls.UNIQUE_VIOLATIONS.items():
+            if name in message:
+                return field
+
+        return None
+
+    @staticmethod
+    def unique_message(field):
+        for constraint in CustomUser._meta.constraints:
+            if constraint.name == f"unique_{field}_ci":
+                return constraint.violation_error_message
+
+        return f"User with this {field} already exists."
+
+
+class ImportUserSerializer(RegisterSerializer):
+    """
+    Same rules as RegisterSerializer for one row of `manage.py import_users`,
+    without any queries, uniqueness is checked per chunk by the command.
+    Rows carry either a raw `password` or an already hashed `password_hash`.
+    """
+
+    password_hash = serializers.CharField(required=False)
+
+    class Meta(RegisterSerializer.Meta):
+        fields = ["email", "username", "password", "password_hash"]
+        extra_kwargs = {
+            **RegisterSerializer.Meta.extra_kwargs,
+            "password": {"write_only": True, "required": False},
+        }
+
+    def validate_password_hash(self, value):
+        try:
+            identify_hasher(value)
+        except ValueError:
+            raise serializers.ValidationError("Unknown password hash format.")
+
+        return value
+
+    def validate(self, attrs):
+        if ("password" in attrs) == ("password_hash" in attrs):
+            raise serializers.ValidationError(
+                "Provide exactly one of password or password_hash."
+            )
+
+        return attrs
+
 
 class LoginSerializer(serializers.Serializer):
     identifier = serializers.CharField()
@@ -91,31 +186,50 @@ class LoginSerializer(serializers.Serializer):
                 "Both identifier and password are required."
             )
 
+        # single lookup, the password is checked against this same instance
+        # instead of letting authenticate() fetch the user again
         if "@" in identifier:
-            try:
-                user_obj = CustomUser.objects.get(email__iexact=identifier)
-            except CustomUser.DoesNotExist:
-                raise serializers.ValidationError("Invalid email or password.")
+            lookup = {"email__lower": identifier.lower()}
+            error = "Invalid email or password."
         else:
-            try:
-                user_obj = CustomUser.objects.get(username__iexact=identifier)
-            except CustomUser.DoesNotExist:
-                raise serializers.ValidationError("Invalid username or password.")
-
-        # get user data based on email/username
-        user = authenticate(
-            request=self.context.get("request"),
-            email=user_obj.email,
-            password=attrs["password"],
-        )
+            lookup = {"username__lower": identifier.lower()}
+            error = "Invalid username or password."
 
-        if not user:
+        try:
+            user = CustomUser.objects.get(**lookup)
+        except CustomUser.DoesNotExist:
+            # hash anyway like ModelBackend so timing doesn't leak which accounts exist
+            CustomUser().set_password(password)
+            raise serializers.ValidationError(error)
+
+        if not user.check_password(password) or not user.is_active:
             raise serializers.ValidationError("Invalid credentials")
 
         attrs["user"] = user
         return attrs
 
 
+class UserDataSerializer(serializers.ModelSerializer):
+    """User payload returned to clients alongside their tokens"""
+
+    class Meta:
+        model = CustomUser
+        fields = ["id", "email", "username", "is_staff", "is_superuser", "is_verified"]
+        read_only_fields = fields
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = UserRefreshToken
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = UserRefreshToken
+
+
+class UserTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = UserRefreshToken
+
+
 class VerificationSerializer(serializers.Serializer):
     email = serializers.EmailField()
     code = serializers.IntegerField()
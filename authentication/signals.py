@@ -0,0 +1,33 @@
+from functools import partial
+
+"""django imports"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+"""drf imports"""
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+"""local imports"""
+from .authentication import user_cache_key
+from .blacklist import blacklist_filter
+from .models import CustomUser
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    # CachedJWTAuthentication must never serve a stale user after a change,
+    # dropped once committed so a concurrent miss can't cache the old row
+    # (the key is built now, delete() clears instance.pk)
+    transaction.on_commit(
+        partial(cache.delete, user_cache_key(instance.pk)), using=using
+    )
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_to_blacklist_filter(sender, instance, created, **kwargs):
+    if created:
+        blacklist_filter.add(instance.token.jti)
+        # other processes would sync before the row is visible to them
+        transaction.on_commit(blacklist_filter.publish)
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+import pytest
+
+from authentication.blacklist import blacklist_filter
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # throttle counters and cached codes must not leak between tests
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_blacklist_filter(settings):
+    # rows are rolled back between tests, the per-process filter must follow.
+    # A loader thread wouldn't see the test's uncommitted rows, build inline.
+    settings.TOKEN_BLACKLIST_FILTER = {
+        **settings.TOKEN_BLACKLIST_FILTER,
+        "LOAD_IN_BACKGROUND": False,
+    }
+    blacklist_filter.reset()
+
+
+@pytest.fixture(autouse=True)
+def metrics_directory(settings, tmp_path):
+    # every test starts from empty counters
+    settings.METRICS = {**settings.METRICS, "DIRECTORY": str(tmp_path / "metrics")}
+
+
+@pytest.fixture(autouse=True)
+def email_backend(settings):
+    # never call Resend from tests
+    from authentication.uitls import LocMemEmailBackend
+
+    settings.EMAIL_DELIVERY = {"BACKEND": "authentication.uitls.LocMemEmailBackend"}
+    LocMemEmailBackend.outbox.clear()
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # a second, independent database for the replica router tests, it never
+    # receives the primary's writes so a read routed there is easy to spot
+    from django.conf import settings
+    from django.db import connections
+
+    settings.DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": settings.BASE_DIR / "replica.sqlite3",
+    }
+    # connections already read DATABASES, fill in the new alias' defaults
+    connections.configure_settings(settings.DATABASES)
@@ -0,0 +1,47 @@
+from django.urls import reverse
+import pytest
+
+from authentication.models import CustomUser, OneTimeCode
+
+
+@pytest.mark.django_db
+class TestAdmin:
+    def setup_method(self):
+        self.admin = CustomUser.objects.create_superuser(
+            email="admin@b.com", username="admin", password="strongpass123"
+        )
+
+    def test_user_search_modes(self, client):
+        CustomUser.objects.create(email="Jane@b.com", username="jane_d")
+        CustomUser.objects.create(email="john@b.com", username="john")
+        client.force_login(self.admin)
+        url = reverse("admin:authentication_customuser_changelist")
+
+        def found(term):
+            response = client.get(url, {"q": term})
+            return sorted(user.username for user in response.context["cl"].result_list)
+
+        assert found("JA") == ["jane_d"]
+        assert found("jane@b.com") == ["jane_d"]
+        assert found("j") == ["jane_d", "john"]
+        assert found(str(self.admin.pk)) == ["admin"]
+        # no more substring matches
+        assert found("ohn") == []
+
+    def test_code_changelist_has_no_n_plus_one(
+        self, client, django_assert_max_num_queries
+    ):
+        for i in range(10):
+            user = CustomUser.objects.create(email=f"u{i}@b.com", username=f"user{i}")
+            OneTimeCode.objects.create(
+                user=user, purpose=OneTimeCode.Purpose.VERIFY_EMAIL, code=123456
+            )
+        client.force_login(self.admin)
+
+        with django_assert_max_num_queries(8):
+            response = client.get(
+                reverse("admin:authentication_onetimecode_changelist")
+            )
+
+        assert response.status_code == 200
+        assert "Email verification for user9" in response.content.decode()
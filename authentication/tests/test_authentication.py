@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+import pytest
+
+from authentication.authentication import (
+    ClaimsJWTAuthentication,
+    CachedJWTAuthentication,
+    user_cache_key,
+)
+from authentication.models import CustomUser
+from authentication.tokens import UserRefreshToken
+
+
+@pytest.mark.django_db
+class TestJWTAuthentication:
+    def setup_method(self):
+        self.user = CustomUser.objects.create(
+            email="a@b.com", username="v.ald_1", is_verified=True
+        )
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+    def test_claims_authentication_makes_no_queries(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            user, token = ClaimsJWTAuthentication().authenticate(self.request)
+
+        assert str(user.id) == str(self.user.id)
+        assert user.username == "v.ald_1"
+        assert user.is_verified is True
+        assert user.is_staff is False
+
+    def test_cached_authentication_invalidated_on_save(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        auth = CachedJWTAuthentication()
+
+        with django_assert_num_queries(1):
+            auth.authenticate(self.request)
+
+        with django_assert_num_queries(0):
+            user, token = auth.authenticate(self.request)
+
+        assert user == self.user
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self.user.username = "renamed"
+            self.user.save()
+
+            # the cached user stays until the save is committed
+            with django_assert_num_queries(0):
+                auth.authenticate(self.request)
+
+        with django_assert_num_queries(1):
+            user, token = auth.authenticate(self.request)
+
+        assert user.username == "renamed"
+
+    def test_cached_user_leaves_out_the_password(self, django_assert_num_queries):
+        self.user.set_password("strongpass123")
+        self.user.save()
+
+        auth = CachedJWTAuthentication()
+        auth.authenticate(self.request)
+
+        _, fields, password_hash = cache.get(user_cache_key(self.user.pk))
+        assert "password" not in fields
+        assert self.user.password not in (password_hash, *fields.values())
+
+        with django_assert_num_queries(0):
+            user, token = auth.authenticate(self.request)
+
+        assert user.is_verified is True
+        assert user.version == self.user.version
+
+        # the rest is loaded on access
+        with django_assert_num_queries(1):
+            assert user.date_joined == self.user.date_joined
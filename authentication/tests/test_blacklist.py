@@ -0,0 +1,153 @@
+import threading
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+import pytest
+
+from authentication.blacklist import (
+    CHANGES_CACHE_KEY,
+    BlacklistFilter,
+    BloomFilter,
+    blacklist_filter,
+)
+from authentication.models import CustomUser
+from authentication.tokens import UserRefreshToken
+
+
+class TestBloomFilter:
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        members = [f"jti-{i}" for i in range(1000)]
+
+        for jti in members:
+            bloom.add(jti)
+
+        assert all(jti in bloom for jti in members)
+
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        assert false_positives / 10_000 < 0.03
+        assert bloom.false_positive_rate == pytest.approx(0.01, rel=0.5)
+
+
+@pytest.mark.django_db
+class TestBlacklistFilter:
+    def setup_method(self):
+        self.client = APIClient()
+        user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        self.refresh = str(UserRefreshToken.for_user(user))
+
+    def test_refresh_skips_blacklist_query(self):
+        blacklist_filter.ensure_fresh()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("token_refresh"), {"refresh": self.refresh}, format="json"
+            )
+
+        assert response.status_code == 200
+        assert not any(
+            "token_blacklist_blacklistedtoken" in query["sql"] for query in queries
+        )
+
+    def test_blacklisted_token_rejected(self):
+        response = self.client.post(
+            reverse("token_blacklist"), {"refresh": self.refresh}, format="json"
+        )
+        assert response.status_code == 200
+
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": self.refresh}, format="json"
+        )
+        assert response.status_code == 401
+        assert blacklist_filter.stats()["tokens"] == 1
+
+    def blacklist_elsewhere(self, blacklisted_at=None):
+        """Blacklist a new token as another process would, no signal here"""
+
+        user = CustomUser.objects.get()
+        token = UserRefreshToken.for_user(user)
+        outstanding = OutstandingToken.objects.get(jti=token["jti"])
+        [row] = BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token=outstanding)]
+        )
+        if blacklisted_at is not None:
+            BlacklistedToken.objects.filter(pk=row.pk).update(
+                blacklisted_at=blacklisted_at
+            )
+
+        return token["jti"]
+
+    def test_sync_picks_up_rows_committed_late(self):
+        first = self.blacklist_elsewhere()
+        blacklist_filter.ensure_fresh()
+
+        # stamped before the newest row seen but committed after the last sync
+        late = self.blacklist_elsewhere(timezone.now() - timedelta(seconds=30))
+        blacklist_filter.synced_at = 0.0
+
+        assert blacklist_filter.might_contain(first)
+        assert blacklist_filter.might_contain(late)
+
+    def test_publishes_on_commit(self, django_capture_on_commit_callbacks):
+        blacklist_filter.ensure_fresh()
+        changes = cache.get(CHANGES_CACHE_KEY)
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            response = self.client.post(
+                reverse("token_blacklist"), {"refresh": self.refresh}, format="json"
+            )
+            assert response.status_code == 200
+            # other processes must not sync before the row is visible
+            assert cache.get(CHANGES_CACHE_KEY) == changes
+
+        assert callbacks
+        assert cache.get(CHANGES_CACHE_KEY) != changes
+
+        # another process sees the counter move and syncs right away
+        other = BlacklistFilter()
+        other.load()
+        other.changes = changes
+        late = self.blacklist_elsewhere()
+        assert other.might_contain(late)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_filter_built_in_background(settings):
+    settings.TOKEN_BLACKLIST_FILTER = {
+        **settings.TOKEN_BLACKLIST_FILTER,
+        "LOAD_IN_BACKGROUND": True,
+    }
+    user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+    refresh = UserRefreshToken.for_user(user)
+    refresh.blacklist()
+
+    done = threading.Event()
+    load = BlacklistFilter.load
+
+    def slow_load(self, capacity=None):
+        done.wait(5)
+        load(self, capacity)
+
+    blacklist_filter.load = slow_load.__get__(blacklist_filter)
+    try:
+        # nothing to go on yet, the db decides
+        assert blacklist_filter.might_contain("not-blacklisted")
+        assert blacklist_filter.bloom is None
+    finally:
+        done.set()
+        for thread in threading.enumerate():
+            if thread.name == "blacklist-filter-load":
+                thread.join(5)
+        del blacklist_filter.load
+
+    assert blacklist_filter.might_contain(refresh["jti"])
+    assert not blacklist_filter.might_contain("not-blacklisted")
@@ -0,0 +1,97 @@
+from django.test import override_settings
+from django.core.cache import cache
+import pytest
+
+from authentication.codes import (
+    get_code_store,
+    VERIFY_EMAIL,
+    RESET_PASSWORD,
+)
+from authentication.models import CustomUser, OneTimeCode
+
+
+BACKENDS = [
+    "authentication.codes.ModelCodeStore",
+    "authentication.codes.CacheCodeStore",
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def store(request):
+    cache.clear()
+    with override_settings(ONE_TIME_CODES={"BACKEND": request.param, "TTL": 60}):
+        yield get_code_store()
+
+
+@pytest.fixture
+def user(db):
+    return CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+
+
+@pytest.mark.django_db
+class TestCodeStores:
+    def test_code_is_single_use(self, store, user):
+        code = store.issue(user, VERIFY_EMAIL)
+
+        assert store.verify(user, VERIFY_EMAIL, str(code))
+        assert not store.verify(user, VERIFY_EMAIL, code)
+
+    def test_wrong_code_or_purpose(self, store, user):
+        code = store.issue(user, VERIFY_EMAIL)
+
+        assert not store.verify(user, VERIFY_EMAIL, (code + 1) % 1_000_000)
+        assert not store.verify(user, RESET_PASSWORD, code)
+        assert not store.verify(user, VERIFY_EMAIL, "not a code")
+        assert store.verify(user, VERIFY_EMAIL, code)
+
+    def test_reissue_replaces_previous_code(self, store, user):
+        first = store.issue(user, RESET_PASSWORD)
+        second = store.issue(user, RESET_PASSWORD)
+
+        if first != second:
+            assert not store.verify(user, RESET_PASSWORD, first)
+        assert store.verify(user, RESET_PASSWORD, second)
+
+    def test_invalidate(self, store, user):
+        code = store.issue(user, VERIFY_EMAIL)
+        store.invalidate(user, VERIFY_EMAIL)
+
+        assert not store.verify(user, VERIFY_EMAIL, code)
+
+    def test_expired_code(self, store, user):
+        store.ttl = 0
+        code = store.issue(user, VERIFY_EMAIL)
+
+        assert not store.verify(user, VERIFY_EMAIL, code)
+
+
+@pytest.mark.django_db
+class TestModelCodeStore:
+    @pytest.fixture
+    def store(self):
+        with override_settings(ONE_TIME_CODES={"BACKEND": BACKENDS[0], "TTL": 60}):
+            yield get_code_store()
+
+    def test_verify_is_one_conditional_update(
+        self, store, user, django_assert_num_queries
+    ):
+        code = store.issue(user, VERIFY_EMAIL)
+
+        with django_assert_num_queries(1) as queries:
+            assert store.verify(user, VERIFY_EMAIL, code)
+
+        assert queries.captured_queries[0]["sql"].startswith("UPDATE")
+
+        # the loser of a race finds the code already consumed
+        with django_assert_num_queries(1):
+            assert not store.verify(user, VERIFY_EMAIL, code)
+
+    def test_issue_is_one_upsert(self, store, user, django_assert_num_queries):
+        for _ in range(3):
+            with django_assert_num_queries(1):
+                code = store.issue(user, VERIFY_EMAIL)
+        store.issue(user, RESET_PASSWORD)
+
+        # one row per user and purpose, holding the latest code
+        assert OneTimeCode.objects.filter(user=user).count() == 2
+        assert OneTimeCode.objects.get(user=user, purpose=VERIFY_EMAIL).code == code
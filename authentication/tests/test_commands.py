@@ -0,0 +1,283 @@
+import json
+from io import StringIO
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    OutstandingToken,
+    BlacklistedToken,
+)
+import pytest
+
+from authentication.exports import iter_users
+from authentication.models import (
+    CustomUser,
+    EmailOutbox,
+    OneTimeCode,
+)
+from authentication.uitls import EmailProviderUnavailable
+
+
+sent_emails = []
+
+
+def fake_transport(code, email):
+    sent_emails.append((code, email))
+    return True
+
+
+def failing_transport(code, email):
+    raise ConnectionError("provider down")
+
+
+def circuit_open_transport(code, email):
+    raise EmailProviderUnavailable("Email provider circuit is open.", 30)
+
+
+def outbox_settings(transport):
+    return {
+        "TRANSPORT": f"authentication.tests.test_commands.{transport}",
+        "BATCH_SIZE": 2,
+        "MAX_ATTEMPTS": 2,
+        "BACKOFF_SECONDS": 0,
+        "POLL_INTERVAL": 0,
+    }
+
+
+@pytest.mark.django_db
+class TestSendQueuedEmails:
+    def setup_method(self):
+        sent_emails.clear()
+
+    @override_settings(EMAIL_OUTBOX=outbox_settings("fake_transport"))
+    def test_drains_outbox_in_batches(self):
+        for i in range(5):
+            EmailOutbox.objects.create(email=f"user{i}@b.com", code="123456")
+
+        call_command("send_queued_emails", "--once", stdout=StringIO())
+
+        assert len(sent_emails) == 5
+        assert not EmailOutbox.objects.exclude(status=EmailOutbox.Status.SENT).exists()
+
+    @override_settings(EMAIL_OUTBOX=outbox_settings("failing_transport"))
+    def test_retries_then_gives_up(self):
+        message = EmailOutbox.objects.create(email="a@b.com", code="123456")
+
+        call_command("send_queued_emails", "--once", stdout=StringIO())
+
+        message.refresh_from_db()
+        assert message.status == EmailOutbox.Status.FAILED
+        assert message.attempts == 2
+        assert message.last_error == "provider down"
+
+    @override_settings(EMAIL_OUTBOX=outbox_settings("failing_transport"))
+    def test_lease_covers_the_whole_batch(self, settings, monkeypatch):
+        settings.EMAIL_DELIVERY = {
+            **settings.EMAIL_DELIVERY,
+            "CONNECT_TIMEOUT": 2,
+            "READ_TIMEOUT": 5,
+        }
+        EmailOutbox.objects.create(email="a@b.com", code="123456")
+        leased = []
+
+        def drain_batch(command):
+            leased.extend(command.claim_batch())
+            return 0, 0
+
+        monkeypatch.setattr(
+            "authentication.management.commands.send_queued_emails.Command.drain_batch",
+            drain_batch,
+        )
+        call_command("send_queued_emails", "--once", stdout=StringIO())
+
+        # 2 messages, each may take the connect and read timeouts
+        assert leased[0].next_attempt_at > timezone.now() + timedelta(seconds=14)
+
+    @override_settings(EMAIL_OUTBOX=outbox_settings("circuit_open_transport"))
+    def test_open_circuit_defers_without_using_attempts(self):
+        for i in range(3):
+            EmailOutbox.objects.create(email=f"user{i}@b.com", code="123456")
+
+        call_command("send_queued_emails", "--once", stdout=StringIO())
+
+        # the first batch is pushed past the circuit's reset, the worker
+        # stops draining there
+        retry_after = timezone.now() + timedelta(seconds=25)
+        deferred = EmailOutbox.objects.filter(next_attempt_at__gt=retry_after)
+        assert deferred.count() == 2
+
+        assert not EmailOutbox.objects.exclude(
+            status=EmailOutbox.Status.PENDING, attempts=0
+        ).exists()
+
+
+@pytest.mark.django_db
+class TestPruneExpired:
+    def setup_method(self):
+        past = timezone.now() - timedelta(minutes=1)
+        future = self.future = timezone.now() + timedelta(minutes=15)
+
+        for i, expires_at in enumerate((past, past, past, future)):
+            user = CustomUser.objects.create(email=f"{i}@b.com", username=f"user{i}")
+            OneTimeCode.objects.create(
+                user=user,
+                purpose=OneTimeCode.Purpose.VERIFY_EMAIL,
+                code=123456,
+                expires_at=expires_at,
+            )
+        OneTimeCode.objects.create(
+            user=user,
+            purpose=OneTimeCode.Purpose.RESET_PASSWORD,
+            code=123456,
+            expires_at=past,
+        )
+
+        token = OutstandingToken.objects.create(
+            user=user, jti="old", token="x", expires_at=past
+        )
+        BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(
+            user=user, jti="new", token="y", expires_at=future
+        )
+
+    def test_dry_run_deletes_nothing(self):
+        out = StringIO()
+        call_command("prune_expired", "--dry-run", "--sleep=0", stdout=out)
+
+        assert "Would delete 4 expired authentication.OneTimeCode" in out.getvalue()
+        assert OneTimeCode.objects.count() == 5
+        assert OutstandingToken.objects.count() == 2
+
+    def test_prunes_in_batches(self):
+        call_command("prune_expired", "--batch-size=2", "--sleep=0", stdout=StringIO())
+
+        assert list(OneTimeCode.objects.values_list("expires_at", flat=True)) == [
+            self.future
+        ]
+        assert list(OutstandingToken.objects.values_list("jti", flat=True)) == ["new"]
+        assert not BlacklistedToken.objects.exists()
+
+    def test_prunes_old_sent_and_failed_emails(self):
+        old = timezone.now() - timedelta(days=2)
+        for status in EmailOutbox.Status.values:
+            EmailOutbox.objects.create(email="a@b.com", code="123456", status=status)
+        EmailOutbox.objects.update(created_at=old)
+        recent = EmailOutbox.objects.create(
+            email="a@b.com", code="123456", status=EmailOutbox.Status.SENT
+        )
+
+        call_command("prune_expired", "--only=outbox", "--sleep=0", stdout=StringIO())
+
+        # pending ones are still retried, recent ones kept for a while
+        assert sorted(EmailOutbox.objects.values_list("status", flat=True)) == [
+            EmailOutbox.Status.PENDING,
+            EmailOutbox.Status.SENT,
+        ]
+        assert EmailOutbox.objects.filter(pk=recent.pk).exists()
+
+
+@pytest.mark.django_db
+class TestImportUsers:
+    def test_imports_valid_unique_rows(self, tmp_path):
+        CustomUser.objects.create(email="taken@b.com", username="taken")
+        source = tmp_path / "users.csv"
+        source.write_text(
+            "email,username,password,password_hash\n"
+            "one@b.com,One,strongpass123,\n"
+            f"two@b.com,two,,{make_password('strongpass123')}\n"
+            "TAKEN@b.com,new,strongpass123,\n"
+            "three@b.com,ONE,strongpass123,\n"
+            "bad-email,bad,strongpass123,\n"
+            "four@b.com,four,123,\n"
+        )
+        errors = tmp_path / "errors.jsonl"
+
+        call_command(
+            "import_users",
+            str(source),
+            "--workers=1",
+            f"--errors={errors}",
+            "--verified",
+            stdout=StringIO(),
+        )
+
+        assert set(CustomUser.objects.values_list("username", flat=True)) == {
+            "taken",
+            "one",
+            "two",
+        }
+        assert CustomUser.objects.get(username="one").check_password("strongpass123")
+        assert CustomUser.objects.get(username="two").check_password("strongpass123")
+        assert CustomUser.objects.get(username="two").is_verified
+        assert [
+            json.loads(line)["row"] for line in errors.read_text().splitlines()
+        ] == [
+            5,
+            6,
+            3,
+            4,
+        ]
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        source = tmp_path / "users.jsonl"
+        password_hash = make_password("strongpass123")
+        source.write_text(
+            "".join(
+                json.dumps(
+                    {
+                        "email": f"u{i}@b.com",
+                        "username": f"user{i}",
+                        "password_hash": password_hash,
+                    }
+                )
+                + "\n"
+                for i in range(5)
+            )
+        )
+        checkpoint = tmp_path / "checkpoint.json"
+        checkpoint.write_text(json.dumps({"path": str(source), "rows": 3}))
+
+        call_command(
+            "import_users",
+            str(source),
+            "--workers=1",
+            "--chunk-size=1",
+            f"--checkpoint={checkpoint}",
+            stdout=StringIO(),
+        )
+
+        assert list(
+            CustomUser.objects.order_by("pk").values_list("username", flat=True)
+        ) == [
+            "user3",
+            "user4",
+        ]
+        assert json.loads(checkpoint.read_text())["rows"] == 5
+
+
+@pytest.mark.django_db
+class TestExportUsers:
+    def test_keyset_pages(self, django_assert_num_queries):
+        for i in range(5):
+            CustomUser.objects.create(email=f"u{i}@b.com", username=f"user{i}")
+
+        # pages of 2, 2 and 1 rows, the short page ends the walk
+        with django_assert_num_queries(3):
+            rows = list(iter_users(chunk_size=2))
+
+        assert [row["username"] for row in rows] == [f"user{i}" for i in range(5)]
+
+    def test_command_writes_csv(self, tmp_path):
+        CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        output = tmp_path / "users.csv"
+
+        call_command(
+            "export_users", "--format=csv", f"--output={output}", stderr=StringIO()
+        )
+
+        lines = output.read_text().splitlines()
+        assert lines[0] == "id,email,username,is_verified,date_joined"
+        assert lines[1].split(",")[1:4] == ["a@b.com", "v.ald_1", "False"]
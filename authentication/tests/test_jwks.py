@@ -0,0 +1,183 @@
+import json
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.state import token_backend as hs256_backend
+import pytest
+
+from authentication.jwks import get_token_backend
+from authentication.models import CustomUser
+from authentication.tokens import UserAccessToken, UserRefreshToken
+
+
+def private_pem(key):
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def public_pem(key):
+    return (
+        key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {
+        "rsa": rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "ed": ed25519.Ed25519PrivateKey.generate(),
+        "retired": ed25519.Ed25519PrivateKey.generate(),
+    }
+
+
+@pytest.fixture
+def signing(settings, keys):
+    def configure(signing_kid, retired_public_only=True):
+        settings.JWT_SIGNING = {
+            **settings.JWT_SIGNING,
+            "KEYS": {
+                "rsa": private_pem(keys["rsa"]),
+                "ed": private_pem(keys["ed"]),
+                "retired": (public_pem if retired_public_only else private_pem)(
+                    keys["retired"]
+                ),
+            },
+            "SIGNING_KID": signing_kid,
+        }
+
+    return configure
+
+
+@pytest.fixture
+def user(db):
+    return CustomUser.objects.create_user(
+        email="a@b.com", username="v.ald_1", password="strongpass123"
+    )
+
+
+class TestKeyRingTokenBackend:
+    @pytest.mark.parametrize("kid, algorithm", [("rsa", "RS256"), ("ed", "EdDSA")])
+    def test_signs_with_current_key(self, signing, keys, user, kid, algorithm):
+        signing(kid)
+        raw = str(UserRefreshToken.for_user(user).access_token)
+
+        assert jwt.get_unverified_header(raw) == {
+            "alg": algorithm,
+            "kid": kid,
+            "typ": "JWT",
+        }
+        assert UserAccessToken(raw)["username"] == "v.ald_1"
+
+    def test_rotation_keeps_older_tokens_valid(self, signing, user):
+        signing("retired", retired_public_only=False)
+        raw = str(UserRefreshToken.for_user(user).access_token)
+
+        # the retired key is public only now, it can't sign but still verifies
+        signing("ed")
+        assert UserAccessToken(raw)["user_id"] == str(user.pk)
+
+        with pytest.raises(ImproperlyConfigured):
+            signing("retired")
+            get_token_backend()
+
+    def test_rejects_unknown_kid_and_hs256(self, signing, keys, user):
+        signing("ed")
+        payload = UserRefreshToken.for_user(user).access_token.payload
+
+        unknown = jwt.encode(
+            payload, keys["ed"], algorithm="EdDSA", headers={"kid": "other"}
+        )
+        # same kid but a different algorithm than the key's
+        hs256 = jwt.encode(payload, "secret", algorithm="HS256", headers={"kid": "ed"})
+
+        for raw in (unknown, hs256, hs256_backend.encode(payload)):
+            with pytest.raises(TokenError):
+                UserAccessToken(raw)
+
+    def test_keys_parsed_once(self, signing):
+        signing("rsa")
+
+        assert get_token_backend() is get_token_backend()
+
+    def test_defaults_to_hs256(self, user):
+        raw = str(UserRefreshToken.for_user(user).access_token)
+
+        assert get_token_backend() is hs256_backend
+        assert jwt.get_unverified_header(raw)["alg"] == "HS256"
+
+    def test_authenticates_requests(self, signing, user):
+        signing("ed")
+        client = APIClient()
+        login = client.post(
+            reverse("login"),
+            {"identifier": "a@b.com", "password": "strongpass123"},
+            format="json",
+        )
+        access = login.data["access"]
+
+        assert jwt.get_unverified_header(access)["kid"] == "ed"
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        assert client.get(reverse("me")).status_code == 200
+
+        # refreshed access tokens are signed with the keys too
+        refreshed = client.post(
+            reverse("token_refresh"), {"refresh": login.data["refresh"]}, format="json"
+        ).data["access"]
+        assert jwt.get_unverified_header(refreshed)["kid"] == "ed"
+
+
+class TestJWKSView:
+    def test_publishes_public_keys(self, client, signing, user):
+        signing("ed")
+        response = client.get(reverse("jwks"))
+
+        assert response.status_code == 200
+        assert response["Cache-Control"] == "public, max-age=300"
+
+        jwks = json.loads(response.content)
+        assert [key["kid"] for key in jwks["keys"]] == ["rsa", "ed", "retired"]
+        assert not any("d" in key for key in jwks["keys"])
+
+        # what another service does: verify offline with the published key
+        raw = str(UserRefreshToken.for_user(user).access_token)
+        kid = jwt.get_unverified_header(raw)["kid"]
+        jwk = next(key for key in jwks["keys"] if key["kid"] == kid)
+        claims = jwt.decode(raw, jwt.PyJWK(jwk).key, algorithms=[jwk["alg"]])
+
+        assert claims["username"] == "v.ald_1"
+
+    def test_conditional_get(self, client, settings, signing):
+        signing("ed")
+        etag = client.get(reverse("jwks"))["ETag"]
+
+        response = client.get(reverse("jwks"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+        # dropping a key changes the document
+        keys = dict(settings.JWT_SIGNING["KEYS"])
+        del keys["retired"]
+        settings.JWT_SIGNING = {**settings.JWT_SIGNING, "KEYS": keys}
+
+        response = client.get(reverse("jwks"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_empty_without_keys(self, client):
+        response = client.get(reverse("jwks"))
+
+        assert json.loads(response.content) == {"keys": []}
@@ -0,0 +1,116 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+import pytest
+
+from authentication import metrics
+from authentication.metrics import MmapStore, read_entries
+from authentication.models import CustomUser
+
+
+class TestMmapStore:
+    def test_processes_are_summed(self, settings, tmp_path):
+        settings.METRICS = {"ENABLED": True, "DIRECTORY": str(tmp_path)}
+
+        # two worker processes writing the same samples
+        first = MmapStore(str(tmp_path / "1.db"))
+        second = MmapStore(str(tmp_path / "2.db"))
+        first.add([("a", 1), ("b", 2.5)])
+        second.add([("a", 3)])
+
+        assert metrics.collect() == {"a": 4.0, "b": 2.5}
+
+    def test_grows_and_reopens(self, tmp_path):
+        path = str(tmp_path / "1.db")
+        keys = [f"sample_{i}" * 20 for i in range(2000)]
+
+        store = MmapStore(path)
+        store.add([(key, 1) for key in keys])
+        store.close()
+
+        # a restarted worker with a reused pid keeps counting
+        store = MmapStore(path)
+        store.add([(keys[0], 1)])
+
+        with open(path, "rb") as f:
+            values = {key: value for key, value, _ in read_entries(f.read())}
+
+        assert len(values) == 2000
+        assert values[keys[0]] == 2
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+
+    def login(self, password):
+        return self.client.post(
+            reverse("login"),
+            {"identifier": "a@b.com", "password": password},
+            format="json",
+        )
+
+    def test_counts_logins_and_latency(self):
+        self.login("strongpass123")
+        self.login("wrong-password")
+        self.login("wrong-password")
+
+        body = metrics.render()
+
+        assert 'auth_logins_total{outcome="success"} 1' in body
+        assert 'auth_logins_total{outcome="failure"} 2' in body
+        assert 'http_requests_total{method="POST",status="400",view="login"} 2' in body
+        assert (
+            'http_request_duration_seconds_bucket{method="POST",view="login",le="+Inf"} 3'
+            in body
+        )
+        assert (
+            'http_request_duration_seconds_count{method="POST",view="login"} 3' in body
+        )
+        assert "# TYPE http_request_duration_seconds histogram" in body
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ("FOO", "BAR"):
+            self.client.generic(method, reverse("login"))
+
+        body = metrics.render()
+
+        assert 'http_requests_total{method="other",status="405",view="login"} 2' in body
+        assert "FOO" not in body and "BAR" not in body
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.REQUEST_LATENCY.observe(0.003, view="x", method="GET")
+        metrics.REQUEST_LATENCY.observe(0.3, view="x", method="GET")
+
+        body = metrics.render()
+
+        assert (
+            'http_request_duration_seconds_bucket{method="GET",view="x",le="0.005"} 1'
+            in body
+        )
+        assert (
+            'http_request_duration_seconds_bucket{method="GET",view="x",le="0.25"} 1'
+            in body
+        )
+        assert (
+            'http_request_duration_seconds_bucket{method="GET",view="x",le="0.5"} 2'
+            in body
+        )
+        assert 'http_request_duration_seconds_sum{method="GET",view="x"} 0.303' in body
+
+    def test_admin_only(self):
+        assert self.client.get(reverse("metrics")).status_code == 401
+
+        self.client.force_authenticate(self.user)
+        assert self.client.get(reverse("metrics")).status_code == 403
+
+        self.user.is_staff = True
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("metrics"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == metrics.CONTENT_TYPE
+        assert "# TYPE auth_logins_total counter" in response.content.decode()
@@ -0,0 +1,69 @@
+import json
+import logging
+
+from django.urls import reverse
+from django.test import override_settings
+from rest_framework.test import APIClient
+import pytest
+
+from authentication.instrumentation import timed
+from authentication.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestPerformanceTimingMiddleware:
+    def setup_method(self):
+        self.client = APIClient()
+        CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+
+    def login(self):
+        return self.client.post(
+            reverse("login"),
+            {"identifier": "a@b.com", "password": "strongpass123"},
+            format="json",
+        )
+
+    def test_login_reports_server_timing(self, caplog):
+        with caplog.at_level(logging.INFO, logger="authentication.performance"):
+            response = self.login()
+
+        assert response.status_code == 200
+
+        header = response["Server-Timing"]
+        assert "db;dur=" in header and 'desc="2 queries"' in header
+        for metric in ("hash;dur=", "render;dur=", "total;dur="):
+            assert metric in header
+
+        line = json.loads(caplog.records[-1].getMessage())
+        assert line["path"] == reverse("login")
+        assert line["status"] == 200
+        assert line["queries"] == 2
+        assert line["hash_ms"] > 0
+
+    @override_settings(PERFORMANCE_TIMING={"SAMPLE_RATE": 0, "HEADER": True})
+    def test_unsampled_requests_are_untouched(self, caplog):
+        with caplog.at_level(logging.INFO, logger="authentication.performance"):
+            response = self.login()
+
+        assert response.status_code == 200
+        assert "Server-Timing" not in response
+        assert not caplog.records
+
+    @override_settings(PERFORMANCE_TIMING={"SAMPLE_RATE": 1, "HEADER": False})
+    def test_header_can_be_disabled(self):
+        assert "Server-Timing" not in self.login()
+
+    def test_timings_logged_without_raising_the_level(self, caplog):
+        # LOGGING lets the INFO lines through, nothing else needs configuring
+        logger = logging.getLogger("authentication.performance")
+        assert logger.isEnabledFor(logging.INFO)
+
+        self.login()
+        assert caplog.records[-1].name == "authentication.performance"
+
+
+def test_timed_outside_a_request_is_a_noop():
+    with timed("hash"):
+        pass
@@ -2,6 +2,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework.exceptions import ValidationError
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 import pytest
 
 from authentication.models import CustomUser
@@ -21,8 +22,38 @@ class TestModels:
         assert instance.username == "v.ald_1"
         assert instance.password != "strongpass123"
     
+    def test_email_and_username_unique_case_insensitive(self):
+        CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+
+        with pytest.raises(IntegrityError):
+            CustomUser.objects.create(email="A@B.com", username="other")
+
+    def test_get_by_email_case_insensitive(self):
+        user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+
+        assert CustomUser.objects.get_by_email("A@b.COM") == user
+
     def test_email_code_creation(self):
         ...
 
     def test_rest_password_code_creation(self):
-        ...
\ No newline at end of file
+        ...
+
+    def test_version_bumped_on_every_write(self):
+        user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        assert user.version == 1
+
+        # bumped in the db, read back on access
+        user.is_verified = True
+        user.save(update_fields=["is_verified"])
+        assert user.version == 2
+
+        CustomUser.objects.filter(pk=user.pk).update(is_verified=False)
+        user.refresh_from_db()
+        assert user.version == 3
+
+        # two instances of the same user saving don't write the same version
+        other = CustomUser.objects.get(pk=user.pk)
+        user.save()
+        other.save()
+        assert other.version == 5
@@ -0,0 +1,107 @@
+import datetime
+import decimal
+import io
+import uuid
+
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+import pytest
+
+from authentication import parsers, renderers
+from authentication.parsers import FastJSONParser
+from authentication.renderers import FastJSONRenderer
+
+PAYLOAD = ReturnDict(
+    {
+        "id": 1,
+        "joined": datetime.datetime(
+            2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+        ),
+        "naive": datetime.datetime(2025, 1, 2, 3, 4, 5),
+        "day": datetime.date(2025, 1, 2),
+        "at": datetime.time(3, 4, 5, 678901),
+        "ttl": datetime.timedelta(minutes=15),
+        "price": decimal.Decimal("1.10"),
+        "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "message": gettext_lazy("This field is required."),
+        "unicode": "h\u00e9llo \u2028 \u2029 \u2713",
+        "nested": [{"a": None, "b": True, 2: 1.5}],
+        "errors": {"email": ["User with this email already exists."]},
+    },
+    serializer=None,
+)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [PAYLOAD, [PAYLOAD, PAYLOAD], {"detail": "Not found."}, [], 2**70, None],
+)
+def test_renderer_output_matches_drf(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize(
+    "data", [1e16, 1e-7, [1.5e300, -2.5e-10, 0.1], {"a": None, "b": 1e22}]
+)
+def test_renderer_float_exponents_match_drf(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize(
+    "value", [float("nan"), float("inf"), -float("inf"), decimal.Decimal("NaN")]
+)
+def test_renderer_non_finite_floats(value):
+    data = {"a": None, "nested": [value]}
+
+    # STRICT_JSON
+    with pytest.raises(ValueError):
+        JSONRenderer().render(data)
+    with pytest.raises(ValueError):
+        FastJSONRenderer().render(data)
+
+    fast, drf = FastJSONRenderer(), JSONRenderer()
+    fast.strict = drf.strict = False
+    assert fast.render(data) == drf.render(data)
+
+
+def test_renderer_indent_falls_back():
+    expected = JSONRenderer().render(PAYLOAD, "application/json; indent=4")
+
+    assert FastJSONRenderer().render(PAYLOAD, "application/json; indent=4") == expected
+
+
+def test_renderer_without_orjson(monkeypatch):
+    monkeypatch.setattr(renderers, "orjson", None)
+
+    assert FastJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'{"identifier": "h\\u00e9llo", "password": "x", "n": [1, 2.5, null]}',
+        '{"name": "héllo"}'.encode(),
+    ],
+)
+def test_parser_matches_drf(body):
+    assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(
+        io.BytesIO(body)
+    )
+
+
+@pytest.mark.parametrize("body", [b'{"a": ', b'{"a": NaN}', b"\xef\xbb\xbf{}", b""])
+def test_parser_errors_match_drf(body, monkeypatch):
+    with pytest.raises(ParseError) as expected:
+        JSONParser().parse(io.BytesIO(body))
+
+    with pytest.raises(ParseError) as fast:
+        FastJSONParser().parse(io.BytesIO(body))
+
+    assert fast.value.detail == expected.value.detail
+
+    monkeypatch.setattr(parsers, "orjson", None)
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io.BytesIO(body))
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.db import DatabaseError, router, transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+import pytest
+
+from authentication import routers
+from authentication.authentication import CachedJWTAuthentication
+from authentication.models import CustomUser
+from authentication.tokens import UserRefreshToken
+
+
+@pytest.fixture(autouse=True)
+def replica_router():
+    with override_settings(
+        DATABASE_ROUTERS=["authentication.routers.ReplicaRouter"],
+        READ_REPLICAS={
+            "ALIASES": ["replica"],
+            "PIN_SECONDS": 5,
+            "HEALTH_CHECK_INTERVAL": 10,
+        },
+    ):
+        routers._health.clear()
+        yield
+        routers._health.clear()
+
+
+@pytest.fixture
+def in_request():
+    token = routers.start_request()
+    yield
+    routers.end_request(token)
+
+
+# transactional, TestCase wraps every test in atomic() which pins reads
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+class TestReplicaRouter:
+    def test_outside_requests_everything_uses_primary(self):
+        assert router.db_for_read(CustomUser) == "default"
+
+    def test_reads_go_to_replica_until_a_write(self, in_request):
+        assert router.db_for_read(CustomUser) == "replica"
+
+        CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+
+        assert router.db_for_read(CustomUser) == "default"
+        assert CustomUser.objects.filter(email="a@b.com").exists()
+
+    def test_atomic_reads_use_primary(self, in_request):
+        with transaction.atomic():
+            assert router.db_for_read(CustomUser) == "default"
+
+    def test_unhealthy_replica_falls_back(self, in_request):
+        with mock.patch.object(
+            routers.connections["replica"],
+            "ensure_connection",
+            side_effect=DatabaseError("down"),
+        ):
+            assert router.db_for_read(CustomUser) == "default"
+
+        # skipped until the next health check
+        assert router.db_for_read(CustomUser) == "default"
+
+    def test_register_then_verify_reads_own_writes(self):
+        client = APIClient()
+
+        response = client.post(
+            reverse("register"),
+            {"email": "a@b.com", "username": "v.ald_1", "password": "strongpass123"},
+            format="json",
+        )
+
+        assert response.status_code == 201
+        assert routers.PIN_COOKIE in response.cookies
+
+        # the replica never got the user, only the pin keeps this off it
+        response = client.post(
+            reverse("resend-code"), {"email": "a@b.com"}, format="json"
+        )
+        assert response.status_code == 200
+
+        client.cookies.pop(routers.PIN_COOKIE)
+        response = client.post(
+            reverse("resend-code"), {"email": "a@b.com"}, format="json"
+        )
+        assert response.status_code == 404
+
+    def test_cached_user_loaded_from_primary(self):
+        user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        access = UserRefreshToken.for_user(user).access_token
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        # a new, unpinned request, the replica never got the user
+        token = routers.start_request()
+        try:
+            assert router.db_for_read(CustomUser) == "replica"
+            authenticated, _ = CachedJWTAuthentication().authenticate(request)
+        finally:
+            routers.end_request(token)
+
+        assert authenticated == user
@@ -0,0 +1,80 @@
+import gzip
+import json
+from unittest import mock
+
+from django.core.management import call_command
+from rest_framework.test import APIClient
+import pytest
+
+from authentication import schema
+from authentication.schema import schema_cache
+
+JSON = "application/vnd.oai.openapi+json"
+
+
+@pytest.fixture(autouse=True)
+def artifact(settings, tmp_path):
+    settings.OPENAPI_SCHEMA = {
+        "ARTIFACT": str(tmp_path / "openapi.json.gz"),
+        "SERVE": False,
+    }
+    yield settings.OPENAPI_SCHEMA["ARTIFACT"]
+    schema_cache.reset()
+
+
+@pytest.mark.django_db
+@pytest.mark.urls("authentication.tests.urls")
+class TestCachedSchemaView:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def get(self, **headers):
+        return self.client.get("/schema/", HTTP_ACCEPT=JSON, headers=headers)
+
+    def test_generated_once(self):
+        with mock.patch.object(
+            schema, "generate_schema", wraps=schema.generate_schema
+        ) as generate:
+            first = self.get()
+            second = self.get()
+
+        assert generate.call_count == 1
+        assert first.status_code == second.status_code == 200
+        assert first.content == second.content
+        assert "/auth/login/" in json.loads(first.content)["paths"]
+
+    def test_conditional_get(self):
+        etag = self.get()["ETag"]
+
+        response = self.get(**{"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_gzip(self):
+        plain = self.get()
+        response = self.get(**{"Accept-Encoding": "gzip, deflate"})
+
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == plain.content
+        assert response["ETag"] != plain["ETag"]
+        assert "Accept-Encoding" in response["Vary"]
+        # either representation's tag validates
+        assert self.get(**{"If-None-Match": response["ETag"]}).status_code == 304
+
+    def test_served_from_artifact(self, artifact):
+        call_command("build_schema")
+        schema_cache.reset()
+
+        with mock.patch.object(schema, "generate_schema") as generate:
+            response = self.get()
+
+        generate.assert_not_called()
+        assert "/auth/login/" in json.loads(response.content)["paths"]
+
+    def test_stale_artifact_is_regenerated(self, artifact):
+        schema.write_artifact(artifact, {"openapi": "3.0.3", "paths": {}}, "old")
+
+        response = self.get()
+
+        assert "/auth/login/" in json.loads(response.content)["paths"]
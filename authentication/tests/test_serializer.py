@@ -0,0 +1,76 @@
+from rest_framework import serializers
+import pytest
+
+from authentication.models import CustomUser
+from authentication.serializer import RegisterSerializer
+
+
+def register_serializer(email="a@b.com", username="v.ald_1"):
+    serializer = RegisterSerializer(
+        data={"email": email, "username": username, "password": "strongpass123"}
+    )
+    assert serializer.is_valid(), serializer.errors
+    return serializer
+
+
+@pytest.mark.django_db
+class TestRegisterSerializer:
+    def test_validation_does_not_query(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            register_serializer()
+
+    def test_create_is_one_lookup_and_one_insert(self, django_assert_num_queries):
+        serializer = register_serializer()
+
+        with django_assert_num_queries(2):
+            serializer.save()
+
+        assert CustomUser.objects.get(email="a@b.com").check_password("strongpass123")
+
+    @pytest.mark.parametrize(
+        "email, username, fields",
+        [
+            ("A@B.com", "other", ["email"]),
+            ("other@b.com", "V.ALD_1", ["username"]),
+            ("A@B.com", "V.ALD_1", ["email", "username"]),
+        ],
+    )
+    def test_duplicate_is_rejected_before_hashing(
+        self, email, username, fields, monkeypatch
+    ):
+        register_serializer().save()
+        serializer = register_serializer(email, username)
+
+        hashed = []
+        monkeypatch.setattr(CustomUser, "set_password", hashed.append)
+
+        with pytest.raises(serializers.ValidationError) as error:
+            serializer.save()
+
+        assert hashed == []
+        assert error.value.detail == {
+            field: [f"User with this {field} already exists."] for field in fields
+        }
+
+    @pytest.mark.parametrize(
+        "email, username, field",
+        [
+            ("A@B.com", "other", "email"),
+            ("other@b.com", "V.ALD_1", "username"),
+        ],
+    )
+    def test_concurrent_duplicate_maps_to_field_error(
+        self, email, username, field, monkeypatch
+    ):
+        # both signups pass validation and the lookup before either is saved
+        first = register_serializer()
+        second = register_serializer(email, username)
+        first.save()
+        monkeypatch.setattr(RegisterSerializer, "taken_fields", lambda *args: [])
+
+        with pytest.raises(serializers.ValidationError) as error:
+            second.save()
+
+        assert error.value.detail == {
+            field: [f"User with this {field} already exists."]
+        }
@@ -0,0 +1,50 @@
+import importlib
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+import pytest
+
+from authentication.models import CustomUser
+
+
+@pytest.fixture
+def api_profile(monkeypatch):
+    monkeypatch.setenv("API_BASE_SETTINGS", "development")
+    api = importlib.import_module("config.settings.api")
+
+    with override_settings(
+        MIDDLEWARE=api.MIDDLEWARE,
+        ROOT_URLCONF=api.ROOT_URLCONF,
+        REST_FRAMEWORK=api.REST_FRAMEWORK,
+        TEMPLATES=api.TEMPLATES,
+    ):
+        yield api
+
+
+@pytest.mark.django_db
+class TestApiProfile:
+    def test_stripped_down(self, api_profile):
+        assert "django.contrib.admin" not in api_profile.INSTALLED_APPS
+        assert "django.contrib.sessions" not in api_profile.INSTALLED_APPS
+        assert not any("csrf" in m or "session" in m for m in api_profile.MIDDLEWARE)
+
+    def test_jwt_flow_without_sessions(self, api_profile):
+        client = APIClient(enforce_csrf_checks=True)
+        CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123", is_staff=True
+        )
+
+        response = client.post(
+            "/auth/login/",
+            {"identifier": "a@b.com", "password": "strongpass123"},
+            format="json",
+        )
+
+        assert response.status_code == 200
+        assert not response.cookies
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        assert client.get("/metrics/").status_code == 200
+
+    def test_admin_not_routed(self, api_profile):
+        assert APIClient().get("/admin/").status_code == 404
@@ -0,0 +1,61 @@
+import importlib
+import sys
+
+from django.db.utils import ConnectionHandler
+import pytest
+
+
+def load_production(monkeypatch, **env):
+    monkeypatch.setenv("ALLOWED_HOSTS", "api.example.com")
+    monkeypatch.setenv("DB_NAME", "app")
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+
+    monkeypatch.delitem(sys.modules, "config.settings.production", raising=False)
+    return importlib.import_module("config.settings.production")
+
+
+def test_persistent_connections(monkeypatch):
+    monkeypatch.delenv("DB_POOL", raising=False)
+    production = load_production(monkeypatch, DB_CONN_MAX_AGE="120")
+    database = production.DATABASES["default"]
+
+    assert database["CONN_MAX_AGE"] == 120
+    assert database["CONN_HEALTH_CHECKS"] is True
+    assert "pool" not in database["OPTIONS"]
+
+
+def test_connection_pool(monkeypatch):
+    pytest.importorskip("psycopg_pool")
+
+    production = load_production(
+        monkeypatch, DB_POOL="True", DB_CONN_MAX_AGE="120", DB_POOL_MAX_SIZE="4"
+    )
+    database = production.DATABASES["default"]
+
+    assert database["CONN_MAX_AGE"] == 0
+
+    # django builds the pool lazily without connecting
+    connection = ConnectionHandler({"default": database})["default"]
+    pool = connection.pool
+    try:
+        assert pool.max_size == 4
+        assert pool.min_size == 2
+        assert pool.timeout == 10
+    finally:
+        connection.close_pool()
+
+
+def test_read_replicas(monkeypatch):
+    production = load_production(
+        monkeypatch, DB_REPLICA_HOSTS="replica-a, replica-b", DB_REPLICA_USER="reader"
+    )
+
+    assert production.READ_REPLICAS["ALIASES"] == ["replica_1", "replica_2"]
+    assert production.DATABASE_ROUTERS == ["authentication.routers.ReplicaRouter"]
+
+    replica = production.DATABASES["replica_2"]
+    assert replica["HOST"] == "replica-b"
+    assert replica["USER"] == "reader"
+    assert replica["NAME"] == "app"
+    assert replica["TEST"] == {"MIRROR": "default"}
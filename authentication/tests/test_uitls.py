@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management import call_command
+import pytest
+import requests
+
+from authentication.models import EmailOutbox
+from authentication.uitls import (
+    CircuitBreaker,
+    EmailDeliveryError,
+    EmailProviderUnavailable,
+    LocMemEmailBackend,
+    ResendEmailBackend,
+    send_verification_email,
+)
+
+
+class FakeResend(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server.requests.append(
+            (self.client_address, self.headers["Authorization"], json.loads(body))
+        )
+        time.sleep(server.delay)
+
+        payload = b'{"id": "1"}'
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeResend)
+    server.daemon_threads = True
+    server.requests = []
+    server.status = 200
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def resend_backend(provider, **options):
+    return ResendEmailBackend(
+        api_key="re_test",
+        from_name="App",
+        from_email="no-reply@b.com",
+        api_url=f"http://127.0.0.1:{provider.server_port}/emails",
+        **options,
+    )
+
+
+class TestResendEmailBackend:
+    def test_reuses_one_connection(self, provider):
+        backend = resend_backend(provider)
+
+        for i in range(3):
+            assert backend.send(f"12345{i}", "a@b.com")
+
+        clients = {client for client, _, _ in provider.requests}
+        assert len(clients) == 1
+
+        _, authorization, body = provider.requests[0]
+        assert authorization == "Bearer re_test"
+        assert body["from"] == "App <no-reply@b.com>"
+        assert body["to"] == ["a@b.com"]
+        assert "123450" in body["html"]
+
+    def test_read_timeout(self, provider):
+        provider.delay = 1
+        backend = resend_backend(provider, read_timeout=0.1)
+
+        start = time.monotonic()
+        with pytest.raises(EmailDeliveryError, match="unreachable"):
+            backend.send("123456", "a@b.com")
+
+        assert time.monotonic() - start < 0.9
+
+    def test_circuit_opens_after_failures(self, provider):
+        provider.status = 503
+        backend = resend_backend(provider, failure_threshold=2, reset_timeout=60)
+
+        for _ in range(2):
+            with pytest.raises(EmailDeliveryError, match="503"):
+                backend.send("123456", "a@b.com")
+
+        # fails fast without calling the provider
+        with pytest.raises(EmailProviderUnavailable, match="circuit is open") as e:
+            backend.send("123456", "a@b.com")
+
+        assert len(provider.requests) == 2
+        assert 59 < e.value.retry_after <= 60
+
+    def test_unexpected_error_ends_trial_call(self, provider, monkeypatch):
+        backend = resend_backend(provider, failure_threshold=1, reset_timeout=0)
+        backend.breaker.record_failure()
+
+        def post(*args, **kwargs):
+            raise ValueError("boom")
+
+        monkeypatch.setattr(requests.Session, "post", post)
+        with pytest.raises(ValueError):
+            backend.send("123456", "a@b.com")
+
+        monkeypatch.undo()
+        assert backend.send("123456", "a@b.com")
+
+    def test_rejected_email_does_not_open_circuit(self, provider):
+        provider.status = 422
+        backend = resend_backend(provider, failure_threshold=1)
+
+        for _ in range(2):
+            with pytest.raises(EmailDeliveryError, match="rejected"):
+                backend.send("123456", "not an email")
+
+        assert len(provider.requests) == 2
+
+
+class TestCircuitBreaker:
+    def test_trial_call_after_reset_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        # one trial at a time while open
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.allow()
+
+        breaker.record_success()
+        assert breaker.allow() and breaker.allow()
+
+
+def test_file_backend(settings, tmp_path):
+    settings.EMAIL_DELIVERY = {
+        "BACKEND": "authentication.uitls.FileEmailBackend",
+        "PATH": tmp_path / "emails.jsonl",
+    }
+
+    assert send_verification_email("123456", "a@b.com")
+    assert send_verification_email("654321", "c@d.com")
+
+    lines = (tmp_path / "emails.jsonl").read_text().splitlines()
+    assert [json.loads(line)["to"] for line in lines] == ["a@b.com", "c@d.com"]
+
+
+@pytest.mark.django_db
+def test_outbox_delivers_through_backend():
+    for i in range(3):
+        EmailOutbox.objects.create(email=f"user{i}@b.com", code="123456")
+
+    call_command("send_queued_emails", "--once", stdout=StringIO())
+
+    assert sorted(email for _, email in LocMemEmailBackend.outbox) == [
+        "user0@b.com",
+        "user1@b.com",
+        "user2@b.com",
+    ]
+    assert not EmailOutbox.objects.exclude(status=EmailOutbox.Status.SENT).exists()
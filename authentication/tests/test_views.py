@@ -0,0 +1,401 @@
+import json
+
+from django.urls import reverse
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.settings import api_settings
+import pytest
+
+from authentication.codes import get_code_store, RESET_PASSWORD, VERIFY_EMAIL
+from authentication.models import CustomUser, OneTimeCode, EmailOutbox
+from authentication.tokens import UserRefreshToken
+
+
+@pytest.mark.django_db
+class TestViews:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def test_register_queues_verification_email(self):
+        response = self.client.post(
+            reverse("register"),
+            {"email": "a@b.com", "username": "v.ald_1", "password": "strongpass123"},
+            format="json",
+        )
+
+        assert response.status_code == 201
+
+        user = CustomUser.objects.get(email="a@b.com")
+        code = OneTimeCode.objects.get(user=user, purpose=VERIFY_EMAIL)
+        message = EmailOutbox.objects.get()
+
+        assert message.email == "a@b.com"
+        assert message.code == str(code.code)
+        assert message.status == EmailOutbox.Status.PENDING
+
+    def test_register_throttled_by_ip(self):
+        rates = {**api_settings.DEFAULT_THROTTLE_RATES, "register_ip": "2/hour"}
+
+        with override_settings(
+            REST_FRAMEWORK={**api_settings.user_settings, "DEFAULT_THROTTLE_RATES": rates}
+        ):
+            statuses = [
+                self.client.post(
+                    reverse("register"),
+                    {
+                        "email": f"user{i}@b.com",
+                        "username": f"user{i}",
+                        "password": "strongpass123",
+                    },
+                    format="json",
+                ).status_code
+                for i in range(3)
+            ]
+
+        # rejected before the password is hashed or anything is written
+        assert statuses == [201, 201, 429]
+        assert CustomUser.objects.count() == 2
+
+    def test_register_duplicate_email(self):
+        CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("register"),
+                {"email": "A@b.com", "username": "other", "password": "strongpass123"},
+                format="json",
+            )
+
+        assert response.status_code == 400
+        assert response.data == {"email": ["User with this email already exists."]}
+        # one lookup catches it before hashing or inserting (savepoints stand
+        # in for BEGIN/ROLLBACK inside the test's transaction)
+        statements = [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+        assert len(statements) == 1 and statements[0].startswith("SELECT")
+        assert not EmailOutbox.objects.exists()
+
+    def test_resend_code_queues_email(self):
+        CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+
+        response = self.client.post(
+            reverse("resend-code"), {"email": "a@b.com"}, format="json"
+        )
+
+        assert response.status_code == 200
+        assert EmailOutbox.objects.filter(email="a@b.com").count() == 1
+
+    def test_login_loads_user_once(self, django_assert_num_queries):
+        user = CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+
+        # one SELECT for the user, one INSERT for the outstanding refresh token
+        with django_assert_num_queries(2):
+            response = self.client.post(
+                reverse("login"),
+                {"identifier": "V.ALD_1", "password": "strongpass123"},
+                format="json",
+            )
+
+        assert response.status_code == 200
+        assert response.data["user_data"] == {
+            "id": user.id,
+            "email": "a@b.com",
+            "username": "v.ald_1",
+            "is_staff": False,
+            "is_superuser": False,
+            "is_verified": False,
+        }
+
+    def test_me_revalidates_with_etag(self, django_assert_num_queries):
+        user = CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+        access = UserRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        response = self.client.get(reverse("me"))
+        etag = response["ETag"]
+
+        assert response.status_code == 200
+        assert response.data == {
+            "id": user.id,
+            "email": "a@b.com",
+            "username": "v.ald_1",
+            "is_staff": False,
+            "is_superuser": False,
+            "is_verified": False,
+        }
+
+        # only the authentication's user lookup, nothing is serialized
+        with django_assert_num_queries(1):
+            response = self.client.get(reverse("me"), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response["ETag"] == etag
+
+        # saves and queryset updates both change the ETag
+        user.is_verified = True
+        user.save(update_fields=["is_verified"])
+        response = self.client.get(reverse("me"), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response.data["is_verified"]
+
+        etag = response["ETag"]
+        CustomUser.objects.filter(pk=user.pk).update(username="renamed")
+        response = self.client.get(reverse("me"), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response.data["username"] == "renamed"
+
+    @override_settings(ME_FROM_CACHE=True)
+    def test_me_from_cache(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        user = CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+        access = UserRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        etag = self.client.get(reverse("me"))["ETag"]
+
+        with django_assert_num_queries(0):
+            assert self.client.get(reverse("me")).status_code == 200
+            response = self.client.get(reverse("me"), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+
+        # saving drops the cached user once committed
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_verified = True
+            user.save(update_fields=["is_verified"])
+
+        response = self.client.get(reverse("me"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data["is_verified"]
+
+        # so do queryset updates, which send no post_save, once committed
+        etag = response["ETag"]
+        with django_capture_on_commit_callbacks(execute=True):
+            CustomUser.objects.filter(pk=user.pk).update(username="renamed")
+            response = self.client.get(reverse("me"), HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304
+
+        response = self.client.get(reverse("me"), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data["username"] == "renamed"
+
+    def test_me_requires_authentication(self):
+        assert self.client.get(reverse("me")).status_code == 401
+
+    def test_login_wrong_password(self):
+        CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+
+        response = self.client.post(
+            reverse("login"),
+            {"identifier": "a@b.com", "password": "wrongpass123"},
+            format="json",
+        )
+
+        assert response.status_code == 400
+
+    @override_settings(
+        ONE_TIME_CODES={"BACKEND": "authentication.codes.CacheCodeStore", "TTL": 60}
+    )
+    def test_verify_email_with_cache_store(self):
+        user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        code = get_code_store().issue(user, VERIFY_EMAIL)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("verify-email"), {"email": "A@b.com", "code": code}, format="json"
+            )
+
+        # user lookup and the is_verified update, the code never touches the db
+        statements = [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+        assert len(statements) == 2
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.is_verified
+
+        response = self.client.post(
+            reverse("verify-email"), {"email": "a@b.com", "code": code}, format="json"
+        )
+        assert response.status_code == 400
+
+    def test_verify_email_consumes_code_in_one_update(self):
+        user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        code = get_code_store().issue(user, VERIFY_EMAIL)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("verify-email"),
+                {"email": "a@b.com", "code": code},
+                format="json",
+            )
+
+        # user lookup, then the code and user updates in one transaction
+        statements = [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+        assert [sql.split()[0] for sql in statements] == ["SELECT", "UPDATE", "UPDATE"]
+        assert response.status_code == 200
+
+        user.refresh_from_db()
+        assert user.is_verified
+        assert OneTimeCode.objects.get(user=user).code is None
+
+    def test_reset_password_hashes_only_valid_codes(self, monkeypatch):
+        user = CustomUser.objects.create_user(
+            email="a@b.com", username="v.ald_1", password="strongpass123"
+        )
+        code = get_code_store().issue(user, RESET_PASSWORD)
+
+        depth = len(connection.atomic_blocks)
+        hashed_in = []
+        set_password = CustomUser.set_password
+
+        def spy(self, raw_password):
+            hashed_in.append(len(connection.atomic_blocks) - depth)
+            set_password(self, raw_password)
+
+        monkeypatch.setattr(CustomUser, "set_password", spy)
+        data = {"email": "a@b.com", "new_password": "newstrongpass123"}
+
+        # a wrong guess costs no hashing
+        response = self.client.patch(
+            reverse("reset"), {**data, "code": code + 1}, format="json"
+        )
+        assert response.status_code == 400
+        assert hashed_in == []
+
+        user.refresh_from_db()
+        assert user.check_password("strongpass123")
+
+        response = self.client.patch(
+            reverse("reset"), {**data, "code": code}, format="json"
+        )
+        assert response.status_code == 200
+        # after the code was consumed, outside any transaction
+        assert hashed_in == [0]
+        assert OneTimeCode.objects.get(user=user).code is None
+
+        user.refresh_from_db()
+        assert user.check_password("newstrongpass123")
+
+    def test_login_throttled_by_identifier_before_hashing(
+        self, django_assert_num_queries
+    ):
+        rates = {**api_settings.DEFAULT_THROTTLE_RATES, "login_identifier": "2/hour"}
+        data = {"identifier": "nobody", "password": "wrongpass123"}
+
+        with override_settings(
+            REST_FRAMEWORK={**api_settings.user_settings, "DEFAULT_THROTTLE_RATES": rates}
+        ):
+            for _ in range(2):
+                assert self.client.post(reverse("login"), data, format="json").status_code == 400
+
+            # rejected before the user lookup or any password hashing
+            with django_assert_num_queries(0):
+                response = self.client.post(reverse("login"), data, format="json")
+
+            # other accounts are still allowed
+            other = self.client.post(
+                reverse("login"), {**data, "identifier": "somebody"}, format="json"
+            )
+
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+        assert other.status_code == 400
+
+    def test_token_endpoint_shares_login_throttles(self, django_assert_num_queries):
+        rates = {**api_settings.DEFAULT_THROTTLE_RATES, "login_identifier": "2/hour"}
+
+        with override_settings(
+            REST_FRAMEWORK={**api_settings.user_settings, "DEFAULT_THROTTLE_RATES": rates}
+        ):
+            # the same account's budget, whichever endpoint is used
+            response = self.client.post(
+                reverse("login"),
+                {"identifier": "A@b.com", "password": "wrongpass123"},
+                format="json",
+            )
+            assert response.status_code == 400
+
+            data = {"email": "a@b.com", "password": "wrongpass123"}
+            response = self.client.post(reverse("token_obtain_pair"), data, format="json")
+            assert response.status_code == 401
+
+            with django_assert_num_queries(0):
+                response = self.client.post(
+                    reverse("token_obtain_pair"), data, format="json"
+                )
+
+        assert response.status_code == 429
+
+    @pytest.mark.parametrize(
+        "proxies, throttled", [({}, True), ({"NUM_PROXIES": 1}, False)]
+    )
+    def test_login_ip_throttle_ignores_spoofed_forwarded_for(self, proxies, throttled):
+        rates = {**api_settings.DEFAULT_THROTTLE_RATES, "login_ip": "2/hour"}
+        data = {"identifier": "nobody", "password": "wrongpass123"}
+
+        with override_settings(
+            REST_FRAMEWORK={
+                **api_settings.user_settings,
+                "DEFAULT_THROTTLE_RATES": rates,
+                **proxies,
+            }
+        ):
+            # one client sending a new X-Forwarded-For every time
+            statuses = [
+                self.client.post(
+                    reverse("login"),
+                    {**data, "identifier": f"user{i}"},
+                    format="json",
+                    HTTP_X_FORWARDED_FOR=f"10.0.0.{i}",
+                ).status_code
+                for i in range(3)
+            ]
+
+        # behind one proxy each entry is a different client
+        assert (statuses[-1] == 429) is throttled
+
+    def test_export_users_streams_ndjson_and_csv(self):
+        admin = CustomUser.objects.create(
+            email="admin@b.com", username="admin", is_staff=True
+        )
+        CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        self.client.force_authenticate(admin)
+
+        response = self.client.get(reverse("export-users"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        assert [row["username"] for row in rows] == ["admin", "v.ald_1"]
+        assert set(rows[0]) == {"id", "email", "username", "is_verified", "date_joined"}
+
+        response = self.client.get(reverse("export-users"), {"format": "csv"})
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert response["Content-Type"] == "text/csv"
+        assert lines[0] == "id,email,username,is_verified,date_joined"
+        assert len(lines) == 3
+
+    def test_export_users_admin_only(self):
+        user = CustomUser.objects.create(email="a@b.com", username="v.ald_1")
+        self.client.force_authenticate(user)
+
+        assert self.client.get(reverse("export-users")).status_code == 403
@@ -0,0 +1,9 @@
+from django.urls import path, include
+
+from authentication.schema import CachedSchemaView
+
+# config.urls only adds schema/ when DEBUG is on at import time
+urlpatterns = [
+    path("auth/", include("authentication.urls")),
+    path("schema/", CachedSchemaView.as_view(), name="schema"),
+]
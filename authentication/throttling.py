@@ -0,0 +1,155 @@
+import hashlib
+
+"""drf imports"""
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+"""django imports"""
+from django.core.exceptions import ImproperlyConfigured
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter throttle
+
+    Keeps one counter per fixed window and estimates the rolling rate as
+    `previous * (1 - elapsed fraction) + current`. Counters are bumped with
+    cache.add()/cache.incr(), which are atomic on redis/memcached, so
+    concurrent workers can't race past the limit like DRF's default
+    read-modify-write history list. Rejected requests count too, so a client
+    that keeps hammering stays locked out until it backs off.
+
+    Rates are read from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"][scope].
+    """
+
+    def get_rate(self):
+        if not getattr(self, "scope", None):
+            raise ImproperlyConfigured(
+                f"You must set `.scope` for '{self.__class__.__name__}' throttle"
+            )
+
+        try:
+            # read at request time so settings overrides are honoured
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{self.scope}' scope"
+            )
+
+    def get_ident_key(self, ident):
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        current_key = f"{self.key}:{int(window)}"
+        previous_key = f"{self.key}:{int(window) - 1}"
+
+        # counters live for two windows so the next one can weigh this one
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # evicted between add() and incr()
+            self.cache.set(current_key, 1, self.duration * 2)
+            current = 1
+
+        previous = self.cache.get(previous_key, 0)
+        elapsed = offset / self.duration
+
+        if previous * (1 - elapsed) + current <= self.num_requests:
+            return True
+
+        self.wait_seconds = self.get_wait(previous, current, offset)
+        return False
+
+    def get_wait(self, previous, current, offset):
+        """Seconds until the estimated rate drops back under the limit"""
+
+        remaining = self.duration - offset
+
+        if current >= self.num_requests:
+            # this window alone is over the limit, wait for it to end and for
+            # its weight in the next window to fall far enough
+            needed = 1 - (self.num_requests - 1) / current
+            return remaining + needed * self.duration
+
+        # the retried request will count too, hence the - 1
+        needed = 1 - (self.num_requests - current - 1) / previous
+        return max(needed * self.duration - offset, 1)
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """
+    Throttle by client IP, REMOTE_ADDR unless NUM_PROXIES says how many
+    X-Forwarded-For entries were added by our own proxies
+    """
+
+    def get_cache_key(self, request, view):
+        return self.get_ident_key(self.get_ident(request))
+
+
+class IdentifierThrottle(SlidingWindowThrottle):
+    """
+    Throttle by the account a request targets (email/username in the body),
+    so one account can't be hammered from many IPs
+    """
+
+    identifier_field = "email"
+
+    def get_cache_key(self, request, view):
+        try:
+            identifier = request.data.get(self.identifier_field)
+        except AttributeError:
+            return None
+
+        if not isinstance(identifier, str) or not identifier.strip():
+            return None
+
+        # hashed so arbitrary user input is a safe, bounded cache key
+        digest = hashlib.sha256(identifier.strip().lower().encode()).hexdigest()
+        return self.get_ident_key(digest)
+
+
+class RegisterIPThrottle(IPThrottle):
+    scope = "register_ip"
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = "login_ip"
+
+
+class LoginIdentifierThrottle(IdentifierThrottle):
+    scope = "login_identifier"
+    identifier_field = "identifier"
+
+
+class TokenObtainIdentifierThrottle(LoginIdentifierThrottle):
+    # token/ takes the email, counted against the same per-account budget
+    identifier_field = "email"
+
+
+class EmailCodeIPThrottle(IPThrottle):
+    scope = "email_code_ip"
+
+
+class EmailCodeThrottle(IdentifierThrottle):
+    scope = "email_code"
+
+
+class VerifyCodeIPThrottle(IPThrottle):
+    scope = "verify_code_ip"
+
+
+class VerifyCodeThrottle(IdentifierThrottle):
+    scope = "verify_code"
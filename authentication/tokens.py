@@ -0,0 +1,43 @@
+"""drf imports"""
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+"""local imports"""
+from .blacklist import blacklist_filter
+from .jwks import get_token_backend
+
+
+class SigningKeysMixin:
+    """Sign and verify with JWT_SIGNING's keys, see jwks.py"""
+
+    def get_token_backend(self):
+        return get_token_backend()
+
+
+class UserAccessToken(SigningKeysMixin, AccessToken):
+    pass
+
+
+class UserRefreshToken(SigningKeysMixin, RefreshToken):
+    """
+    Refresh token carrying the user fields ClaimsJWTAuthentication needs,
+    access tokens made from it copy these claims
+    """
+
+    access_token_class = UserAccessToken
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+
+        token["username"] = user.username
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        token["is_verified"] = user.is_verified
+
+        return token
+
+    def check_blacklist(self):
+        # filter misses are certain, only a probable hit needs the db
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
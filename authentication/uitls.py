@@ -1,13 +1,28 @@
 import os
-import resend
+import json
+import logging
 import secrets
+import threading
+import time
+from pathlib import Path
+
+import requests
 from dotenv import load_dotenv
-from resend.exceptions import ResendError
+from requests.adapters import HTTPAdapter
+
+"""django imports"""
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
 
+from .instrumentation import timed_function
 
 # load .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 def generate_strong_6_digit_number():
     """Generates a cryptographically strong random 6-digit number as a string."""
@@ -17,28 +32,249 @@ def generate_strong_6_digit_number():
     return int(f"{random_int:06d}")
 
 
-def send_verification_email(code: str, email: str) -> bool:
+class EmailDeliveryError(Exception):
+    """The email wasn't sent, the message says why"""
+
+
+class EmailProviderUnavailable(EmailDeliveryError):
+    """
+    The circuit is open so the provider wasn't called at all, sending again
+    is pointless for `retry_after` seconds
+    """
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing provider: after `failure_threshold` failures in a
+    row every call is refused for `reset_timeout` seconds, then a single trial
+    call decides whether to close the circuit again or keep it open
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None  # monotonic time, None while closed
+        self._trial_running = False
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+
+            if self._trial_running:
+                return False
+
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._trial_running = True
+                return True
+
+            return False
+
+    @property
+    def retry_after(self):
+        """Seconds until allow() lets a trial call through, 0 while closed"""
+
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+
+            # a trial call may be in flight already, check back shortly
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            return max(remaining, 1)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class BaseEmailBackend:
+    subject = "Verification Code"
+
+    def __init__(self, **options):
+        pass
+
+    def send(self, code, email):
+        """Send the code to email, returns True or raises EmailDeliveryError"""
+        raise NotImplementedError
+
+    def html(self, code):
+        return f"Here is the verification code you requested: {code}"
+
+
+class ResendEmailBackend(BaseEmailBackend):
     """
-    Send verification code to user email
-    returns True if sucessful False otherwise
+    Sends through Resend's REST API over one keep-alive session per process,
+    with connect/read timeouts and a circuit breaker so a degraded provider
+    fails fast instead of blocking a worker
     """
 
-    try:
-        resend.api_key = os.getenv("RESEND_API_KEY")
+    def __init__(
+        self,
+        api_key=None,
+        from_name=None,
+        from_email=None,
+        api_url="https://api.resend.com/emails",
+        connect_timeout=2,
+        read_timeout=5,
+        pool_size=10,
+        failure_threshold=5,
+        reset_timeout=30,
+        **options,
+    ):
+        super().__init__(**options)
+        self.api_key = api_key or os.getenv("RESEND_API_KEY")
+        from_name = from_name or os.getenv("FROM_NAME")
+        from_email = from_email or os.getenv("FROM_EMAIL")
+        self.sender = f"{from_name} <{from_email}>"
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._session = None  # (pid, requests.Session)
+
+    @property
+    def session(self):
+        pid = os.getpid()
+
+        # a forked worker must not share its parent's sockets
+        if self._session is None or self._session[0] != pid:
+            session = requests.Session()
+            session.headers["Authorization"] = f"Bearer {self.api_key}"
+            # no transparent retries, the outbox retries with backoff
+            adapter = HTTPAdapter(pool_maxsize=self.pool_size, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = (pid, session)
+
+        return self._session[1]
 
-        from_name = os.getenv("FROM_NAME")
-        from_email = os.getenv("FROM_EMAIL")
+    def send(self, code, email):
+        if not self.breaker.allow():
+            raise EmailProviderUnavailable(
+                "Email provider circuit is open.", self.breaker.retry_after
+            )
 
-        params: resend.Emails.SendParams = {
-            "from": f"{from_name} <{from_email}>",
-            "to": [f"{email}"],
-            "subject": "Verification Code",
-            "html": f"Here is the verification code you requested: {code}",
-        }
+        try:
+            response = self.session.post(
+                self.api_url,
+                json={
+                    "from": self.sender,
+                    "to": [email],
+                    "subject": self.subject,
+                    "html": self.html(code),
+                },
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise EmailDeliveryError(f"Email provider unreachable: {e}") from e
+        except Exception:
+            # anything else must still end a trial call, or the circuit
+            # would stay open for good
+            self.breaker.record_failure()
+            raise
 
-        email = resend.Emails.send(params)
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+            raise EmailDeliveryError(
+                f"Email provider failed with {response.status_code}: "
+                f"{response.text[:200]}"
+            )
+
+        # the provider is up even if it rejected this message
+        self.breaker.record_success()
+
+        if not response.ok:
+            raise EmailDeliveryError(
+                f"Email rejected with {response.status_code}: {response.text[:200]}"
+            )
 
         return True
 
-    except ResendError:
-        return False
+
+class LocMemEmailBackend(BaseEmailBackend):
+    """Keeps sent emails in LocMemEmailBackend.outbox, for tests and benchmarks"""
+
+    outbox = []  # (code, email), shared by every instance
+
+    def send(self, code, email):
+        self.outbox.append((code, email))
+        return True
+
+
+class FileEmailBackend(BaseEmailBackend):
+    """Appends every email as a JSON line to `path`, for local development"""
+
+    def __init__(self, path=None, **options):
+        super().__init__(**options)
+        self.path = Path(path or settings.BASE_DIR / "sent_emails.jsonl")
+        self._lock = threading.Lock()
+
+    def send(self, code, email):
+        line = json.dumps(
+            {"to": email, "subject": self.subject, "html": self.html(code)}
+        )
+
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+        return True
+
+
+_backend = None
+
+
+def get_email_backend():
+    global _backend
+
+    if _backend is None:
+        options = dict(settings.EMAIL_DELIVERY)
+        backend = import_string(options.pop("BACKEND"))
+        _backend = backend(**{key.lower(): value for key, value in options.items()})
+
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_email_backend(setting, **kwargs):
+    global _backend
+
+    if setting == "EMAIL_DELIVERY":
+        _backend = None
+
+
+@timed_function("email")
+def send_verification_email(code: str, email: str) -> bool:
+    """
+    Send verification code to user email through EMAIL_DELIVERY["BACKEND"]
+    returns True if sucessful, raises EmailDeliveryError otherwise
+    """
+
+    return get_email_backend().send(code, email)
+
+
+def log_verification_email(code: str, email: str) -> bool:
+    """
+    Local transport for development/tests, logs the code instead of sending it
+    always returns True
+    """
+
+    logger.info("Verification code for %s: %s", email, code)
+
+    return True
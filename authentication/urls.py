@@ -2,16 +2,19 @@ from django.urls import path, include
 from .views import (
     RegisterUser,
     LoginUser,
+    Me,
     Verification,
     ResendCodeEmailVerificationCode,
     PasswordCodeResetRequest,
     PasswordReset,
+    ExportUsers,
 )
 
 urlpatterns = [
     # accounts
     path("register/", RegisterUser.as_view(), name="register"),
     path("login/", LoginUser.as_view(), name="login"),
+    path("me/", Me.as_view(), name="me"),
     # verifications
     path("verify-email/", Verification.as_view(), name="verify-email"),
     path(
@@ -26,4 +29,6 @@ urlpatterns = [
         name="reset-request",
     ),
     path("reset-password/", PasswordReset.as_view(), name="reset"),
+    # admin
+    path("users/export/", ExportUsers.as_view(), name="export-users"),
 ]
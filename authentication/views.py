@@ -1,35 +1,52 @@
-from datetime import timedelta
-
 """drf imports"""
 from rest_framework.views import APIView
 from rest_framework import status
 from rest_framework.generics import CreateAPIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 
 """drf_spectacular imports"""
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 
 """django imports """
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.utils import timezone
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 
 """local imports"""
-from .models import CustomUser, EmailVerificationModel, PasswordResetCodeModel
+from . import metrics
+from .authentication import CachedJWTAuthentication
+from .models import CustomUser, EmailOutbox
 from .serializer import (
     RegisterSerializer,
     LoginSerializer,
+    UserDataSerializer,
     VerificationSerializer,
     ResendCodeSerializer,
     PasswordResetRequestSerialiazer,
     PasswordResetSerialiazer,
 )
-from .uitls import generate_strong_6_digit_number, send_verification_email
+from .tokens import UserRefreshToken
+from .exports import iter_users, FORMATS
+from .renderers import NDJSONRenderer, CSVRenderer
+from .codes import get_code_store, VERIFY_EMAIL, RESET_PASSWORD
+from .throttling import (
+    RegisterIPThrottle,
+    LoginIPThrottle,
+    LoginIdentifierThrottle,
+    TokenObtainIdentifierThrottle,
+    EmailCodeIPThrottle,
+    EmailCodeThrottle,
+    VerifyCodeIPThrottle,
+    VerifyCodeThrottle,
+)
 
 
 @extend_schema(tags=["account"])
@@ -47,18 +64,26 @@ class RegisterUser(CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
 
         serializer.is_valid(raise_exception=True)
 
-        self.perform_create(serializer)
+        # user, code and queued email are committed together or not at all
+        with transaction.atomic():
+            self.perform_create(serializer)
 
-        verification_code = generate_strong_6_digit_number()
-        code_data = EmailVerificationModel.objects.create(
-            user=serializer.instance, code=verification_code
-        )
+            verification_code = get_code_store().issue(
+                serializer.instance, VERIFY_EMAIL
+            )
+            EmailOutbox.objects.create(
+                email=serializer.instance.email, code=str(verification_code)
+            )
+
+        metrics.REGISTRATIONS.inc()
+        metrics.CODES_ISSUED.inc(purpose=VERIFY_EMAIL)
 
         # Custom response data
         custom_data = {
@@ -83,6 +108,7 @@ class LoginUser(APIView):
     """
 
     serializer_class = LoginSerializer
+    throttle_classes = [LoginIPThrottle, LoginIdentifierThrottle]
 
     def post(self, request):
 
@@ -90,36 +116,84 @@ class LoginUser(APIView):
             data=request.data, context={"request": request}
         )
 
-        serializer_class.is_valid(raise_exception=True)
+        if not serializer_class.is_valid():
+            metrics.LOGINS.inc(outcome="failure")
+            raise ValidationError(serializer_class.errors)
 
-        user = serializer_class.validated_data["user"]
-
-        full_user_data = CustomUser.objects.filter(email=user.email).values()
-
-        user_data = full_user_data.first()
+        metrics.LOGINS.inc(outcome="success")
 
-        user_data_returned = {
-            "id": user_data["id"],
-            "email": user_data["email"],
-            "username": user_data["username"],
-            "is_staff": user_data["is_staff"],
-            "is_superuser": user_data["is_superuser"],
-            "is_verified": user_data["is_verified"],
-        }
+        user = serializer_class.validated_data["user"]
 
         # issue JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
 
         return Response(
             {
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
-                "user_data": user_data_returned,
+                "user_data": UserDataSerializer(user).data,
             },
             status=status.HTTP_200_OK,
         )
 
 
+class TokenObtainPair(TokenObtainPairView):
+    """simplejwt's token/ endpoint with the same throttles as login"""
+
+    throttle_classes = [LoginIPThrottle, TokenObtainIdentifierThrottle]
+
+
+@extend_schema(
+    tags=["account"],
+    responses={
+        200: UserDataSerializer,
+        304: OpenApiResponse(description="Not modified, the ETag is still current"),
+    },
+)
+class Me(APIView):
+    """
+    The logged in user, same shape as the `user_data` returned by login
+
+    The response has a strong ETag that changes every time the user is
+    written, send it back in If-None-Match to get an empty 304 instead.
+    With ME_FROM_CACHE the user comes from CachedJWTAuthentication, so JWT
+    requests don't touch the db at all.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_authenticators(self):
+        authenticators = super().get_authenticators()
+
+        if not settings.ME_FROM_CACHE:
+            return authenticators
+
+        return [
+            (
+                CachedJWTAuthentication()
+                if type(authenticator) is JWTAuthentication
+                else authenticator
+            )
+            for authenticator in authenticators
+        ]
+
+    def get(self, request):
+        user = request.user
+        etag = f'"{user.pk}.{user.version}.{request.accepted_renderer.format}"'
+
+        if_none_match = set(parse_etags(request.headers.get("If-None-Match", "")))
+        if if_none_match & {"*", etag}:
+            response = HttpResponseNotModified()
+        else:
+            response = Response(UserDataSerializer(user).data)
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ["Accept", "Authorization"])
+
+        return response
+
+
 # ---------------------------------
 @extend_schema(
     tags=["verification"],
@@ -138,6 +212,7 @@ class Verification(APIView):
     """
 
     serializer_class = VerificationSerializer
+    throttle_classes = [VerifyCodeIPThrottle, VerifyCodeThrottle]
 
     def post(self, request, *args, **kwargs):
         try:
@@ -145,25 +220,24 @@ class Verification(APIView):
             email = data.get("email")
             entered_code = data.get("code")
 
-            user = CustomUser.objects.get(email=email)
-
-            code_data = EmailVerificationModel.objects.get(user=user.id)
+            user = CustomUser.objects.get_by_email(email)
 
             if user.is_verified:
                 return Response({"error": "User already verified"}, status=400)
 
-            if code_data.code != entered_code:
-                return Response({"error": "Invalid code"}, status=400)
-
-            if code_data.is_expired:
-                return Response({"error": "Code expired"}, status=400)
-            user.code_expires_at = None
+            # the code is consumed only if the user is updated too
+            with transaction.atomic():
+                # checks expiry and consumes the code so it can't be reused
+                if not get_code_store().verify(user, VERIFY_EMAIL, entered_code):
+                    metrics.CODE_VERIFICATIONS.inc(
+                        purpose=VERIFY_EMAIL, outcome="invalid"
+                    )
+                    return Response({"error": "Invalid or expired code"}, status=400)
 
-            user.is_verified = True
-            user.save()
+                user.is_verified = True
+                user.save(update_fields=["is_verified"])
 
-            code_data.code = None
-            code_data.save()
+            metrics.CODE_VERIFICATIONS.inc(purpose=VERIFY_EMAIL, outcome="success")
 
             return Response(
                 {"detail": "Email verified."},
@@ -198,6 +272,7 @@ class ResendCodeEmailVerificationCode(APIView):
     """
 
     serializer_class = ResendCodeSerializer
+    throttle_classes = [EmailCodeIPThrottle, EmailCodeThrottle]
 
     def post(self, request, *args, **kwargs):
         data = request.data
@@ -205,7 +280,7 @@ class ResendCodeEmailVerificationCode(APIView):
 
         try:
             # Get user by email
-            user = CustomUser.objects.get(email=email)
+            user = CustomUser.objects.get_by_email(email)
 
             # If already verified, don't resend
             if user.is_verified:
@@ -214,29 +289,25 @@ class ResendCodeEmailVerificationCode(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Generate and save a new code if doesnt exist update otherwise
-            verification_code = generate_strong_6_digit_number()
+            with transaction.atomic():
+                # Generate a new code, replacing any previous one
+                verification_code = get_code_store().issue(user, VERIFY_EMAIL)
 
-            verification_instance, created = (
-                EmailVerificationModel.objects.update_or_create(
-                    user=user,
-                    defaults={
-                        "code": verification_code,
-                        "expires_at": timezone.now() + timedelta(minutes=15),
-                    },
+                # re-send email, delivered by the send_queued_emails worker
+                EmailOutbox.objects.create(
+                    email=user.email, code=str(verification_code)
                 )
-            )
 
-            # re-send email
-            if send_verification_email(code=str(verification_code), email=user.email):
-                # for security reasons don't let user know if email exist or not
-                return Response(
-                    {
-                        "detail": "If this email exists, a reset code has been sent to verify yourself.",
-                        "email": user.email,
-                    },
-                    status=status.HTTP_200_OK,
-                )
+            metrics.CODES_ISSUED.inc(purpose=VERIFY_EMAIL)
+
+            # for security reasons don't let user know if email exist or not
+            return Response(
+                {
+                    "detail": "If this email exists, a reset code has been sent to verify yourself.",
+                    "email": user.email,
+                },
+                status=status.HTTP_200_OK,
+            )
 
         except ObjectDoesNotExist:
             raise NotFound(
@@ -263,44 +334,33 @@ class PasswordCodeResetRequest(APIView):
     """
 
     serializer_class = PasswordResetRequestSerialiazer
+    throttle_classes = [EmailCodeIPThrottle, EmailCodeThrottle]
 
     def post(self, request):
         email = request.data["email"]
 
         try:
             # check if user exist
-            user_data = CustomUser.objects.get(email=email)
-
-            # generate new 6 digit code
-            verification_code = generate_strong_6_digit_number()
-
-            # create new PasswordResetCode object if doesnt exist
-            password_reset_instance, created = (
-                PasswordResetCodeModel.objects.update_or_create(
-                    user=user_data,
-                    defaults={
-                        "code": verification_code,
-                        "expires_at": timezone.now() + timedelta(minutes=15),
-                    },
-                )
-            )
+            user_data = CustomUser.objects.get_by_email(email)
 
-            if send_verification_email(
-                code=str(verification_code),
-                email=email,
-            ):
-                return Response(
-                    {
-                        "message": "If this email exists, a reset code has been sent to verify yourself."
-                    },
-                    status=status.HTTP_201_CREATED,
-                )
-            else:
-                return Response(
-                    {"error": "Something went wrong"},
-                    status=status.HTTP_400_BAD_REQUEST,
+            with transaction.atomic():
+                # generate new 6 digit code, replacing any previous one
+                verification_code = get_code_store().issue(user_data, RESET_PASSWORD)
+
+                # delivered by the send_queued_emails worker
+                EmailOutbox.objects.create(
+                    email=user_data.email, code=str(verification_code)
                 )
 
+            metrics.CODES_ISSUED.inc(purpose=RESET_PASSWORD)
+
+            return Response(
+                {
+                    "message": "If this email exists, a reset code has been sent to verify yourself."
+                },
+                status=status.HTTP_201_CREATED,
+            )
+
         except ObjectDoesNotExist:
             return Response(
                 {
@@ -329,6 +389,7 @@ class PasswordReset(APIView):
     """
 
     serializer_class = PasswordResetSerialiazer
+    throttle_classes = [VerifyCodeIPThrottle, VerifyCodeThrottle]
 
     def patch(self, request):
         email = request.data["email"]
@@ -337,27 +398,27 @@ class PasswordReset(APIView):
 
         try:
             # check if user exist
-            user = CustomUser.objects.get(email=email)
-
-            reset_code = PasswordResetCodeModel.objects.get(user=user.id)
+            user = CustomUser.objects.get_by_email(email)
+
+            # check the code matches and hasn't expired, consuming it in its own
+            # short UPDATE, so wrong guesses never pay for hashing and the
+            # hashing never holds a row lock
+            if not get_code_store().verify(user, RESET_PASSWORD, code):
+                metrics.CODE_VERIFICATIONS.inc(
+                    purpose=RESET_PASSWORD, outcome="invalid"
+                )
+                return Response({"error": "Invalid code."}, status=400)
 
-            # check if code provided by user match one in password reset db
-            if reset_code.code == code:
-                # Hash and update new password in user db
-                # set code in password reset db to NULL
-                # save
-                user.set_password(raw_password=new_password)
-                user.is_verified = True
-                user.save()
+            # Hash and update new password in user db
+            user.set_password(raw_password=new_password)
+            user.is_verified = True
+            user.save(update_fields=["password", "is_verified"])
 
-                reset_code.code = None
-                reset_code.save()
+            metrics.CODE_VERIFICATIONS.inc(purpose=RESET_PASSWORD, outcome="success")
 
-                return Response(
-                    {"message": "Password reset successful."}, status=status.HTTP_200_OK
-                )
-            else:
-                return Response({"error": "Invalid code."}, status=400)
+            return Response(
+                {"message": "Password reset successful."}, status=status.HTTP_200_OK
+            )
 
         except ObjectDoesNotExist:
             return Response(
@@ -372,3 +433,51 @@ class PasswordReset(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+# ---------------------------------
+@extend_schema(
+    tags=["account"],
+    responses={
+        200: OpenApiResponse(description="Users as NDJSON or CSV"),
+        403: OpenApiResponse(description="Admin only"),
+    },
+)
+class ExportUsers(APIView):
+    """
+    Stream every user (id, email, username, is_verified, date_joined), admin only
+
+    - format: `ndjson` (default) or `csv`, or pick it with the Accept header
+
+    Users are read in primary key order a page at a time, memory use doesn't
+    grow with the table.
+    """
+
+    permission_classes = [IsAdminUser]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        renderer = request.accepted_renderer
+
+        response = StreamingHttpResponse(
+            FORMATS[renderer.format](iter_users()),
+            content_type=renderer.media_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="users.{renderer.format}"'
+        )
+
+        return response
+
+
+@extend_schema(exclude=True)
+class Metrics(APIView):
+    """
+    Request and auth metrics of every worker process in the Prometheus text
+    format, admin only (scrape it with an admin access token)
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,49 @@
+"""
+Diff two benchmark result files written with --json
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import json
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "queries"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(
+        f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}\n"
+    )
+
+    names = [name for name in after["results"] if name in before["results"]]
+    width = max(map(len, names), default=0) + 2
+
+    print("".ljust(width) + "".join(metric.rjust(26) for metric in METRICS))
+    for name in names:
+        cells = []
+        for metric in METRICS:
+            old = before["results"][name].get(metric)
+            new = after["results"][name].get(metric)
+
+            if old is None or new is None:
+                cells.append("".rjust(26))
+                continue
+
+            change = f" ({(new - old) / old:+.0%})" if old else ""
+            cells.append(f"{old:g} -> {new:g}{change}".rjust(26))
+
+        print(name.ljust(width) + "".join(cells))
+
+
+if __name__ == "__main__":
+    main()
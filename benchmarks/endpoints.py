@@ -0,0 +1,281 @@
+"""
+Latency, throughput and query counts for every `authentication` endpoint
+
+In-process (default), through the real URL conf and middleware with DRF's
+APIClient against an in-memory test database:
+
+    python -m benchmarks.endpoints --iterations 50 --json before.json
+
+Load mode, concurrent virtual users against a running local server. This
+process must use the same settings/database as the server, it reads codes
+from the EmailOutbox table (no email is ever sent, leave the worker off), and
+the server's throttle rates should be raised or set to None:
+
+    python manage.py runserver --noreload   # or gunicorn config.wsgi -w 4
+    python -m benchmarks.endpoints --url http://127.0.0.1:8000 \\
+        --concurrency 16 --duration 30 --json load.json
+
+Compare two result files with `python -m benchmarks.compare before.json after.json`.
+"""
+
+import argparse
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import setup_django, measure, summarize, report, run_metadata
+
+PASSWORD = "Bench-pass-123"
+NEW_PASSWORD = "Bench-pass-456"
+
+ENDPOINTS = [
+    "register",
+    "login",
+    "verify-email",
+    "resend-code",
+    "reset-request",
+    "reset",
+]
+
+
+def disable_throttles():
+    from django.test import override_settings
+    from rest_framework.settings import api_settings
+
+    rates = {scope: None for scope in api_settings.DEFAULT_THROTTLE_RATES}
+    override_settings(
+        REST_FRAMEWORK={**api_settings.user_settings, "DEFAULT_THROTTLE_RATES": rates}
+    ).enable()
+
+
+def use_fast_hasher():
+    from django.test import override_settings
+
+    override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+    ).enable()
+
+
+def run_in_process(args):
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from authentication.codes import get_code_store, VERIFY_EMAIL, RESET_PASSWORD
+    from authentication.models import CustomUser
+
+    client = APIClient()
+    user = CustomUser.objects.create_user(
+        email="bench@example.com", username="bench", password=PASSWORD
+    )
+
+    def post(name, data, method="post", expected=(200, 201)):
+        response = getattr(client, method)(reverse(name), data, format="json")
+        assert response.status_code in expected, (name, response.status_code)
+
+    def new_user(i):
+        return CustomUser.objects.create(
+            email=f"u{i}@example.com", username=f"u{i:07d}"
+        )
+
+    def verification_code(i):
+        target = new_user(i)
+        return target.email, get_code_store().issue(target, VERIFY_EMAIL)
+
+    def reset_code(i):
+        return get_code_store().issue(user, RESET_PASSWORD)
+
+    scenarios = {
+        "register": (
+            lambda i: (f"r{i}@example.com", f"r{i:07d}"),
+            lambda email, username: post(
+                "register",
+                {"email": email, "username": username, "password": PASSWORD},
+            ),
+        ),
+        "login": (
+            None,
+            lambda: post("login", {"identifier": "bench", "password": PASSWORD}),
+        ),
+        "verify-email": (
+            verification_code,
+            lambda email, code: post("verify-email", {"email": email, "code": code}),
+        ),
+        "resend-code": (
+            None,
+            lambda: post("resend-code", {"email": user.email}),
+        ),
+        "reset-request": (
+            None,
+            lambda: post("reset-request", {"email": user.email}),
+        ),
+        "reset": (
+            lambda i: (reset_code(i),),
+            lambda code: post(
+                "reset",
+                {"email": user.email, "code": code, "new_password": PASSWORD},
+                method="patch",
+            ),
+        ),
+    }
+
+    return {
+        name: measure(func, args.iterations, args.warmup, setup=setup)
+        for name, (setup, func) in scenarios.items()
+        if name in args.endpoints
+    }
+
+
+class LoadClient:
+    """One virtual user walking register -> resend -> verify -> login -> reset"""
+
+    def __init__(self, base_url, record):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.record = record
+
+    def call(self, name, path, data, method="post"):
+        start = time.perf_counter()
+        response = self.session.request(
+            method, f"{self.base_url}/auth/{path}", json=data, timeout=30
+        )
+        self.record(name, (time.perf_counter() - start) * 1000, response.status_code)
+        return response
+
+    def latest_code(self, email):
+        from authentication.models import EmailOutbox
+
+        return (
+            EmailOutbox.objects.filter(email=email)
+            .order_by("-pk")
+            .values_list("code", flat=True)
+            .first()
+        )
+
+    def run_once(self):
+        tag = uuid.uuid4().hex[:7]
+        email, username = f"{tag}@example.com", f"l{tag}"
+
+        self.call(
+            "register",
+            "register/",
+            {"email": email, "username": username, "password": PASSWORD},
+        )
+        self.call("resend-code", "resend-verification/", {"email": email})
+        self.call(
+            "verify-email",
+            "verify-email/",
+            {"email": email, "code": int(self.latest_code(email) or 0)},
+        )
+        self.call("login", "login/", {"identifier": username, "password": PASSWORD})
+        self.call("reset-request", "reset-password-request/", {"email": email})
+        self.call(
+            "reset",
+            "reset-password/",
+            {
+                "email": email,
+                "code": int(self.latest_code(email) or 0),
+                "new_password": NEW_PASSWORD,
+            },
+            method="patch",
+        )
+
+
+def run_load(args):
+    from django.db import connections
+
+    timings = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def record(name, elapsed_ms, status_code):
+        with lock:
+            timings[name].append(elapsed_ms)
+            statuses[name][str(status_code)] += 1
+
+    def worker(_):
+        client = LoadClient(args.url, record)
+        try:
+            while time.monotonic() < deadline:
+                client.run_once()
+        finally:
+            connections.close_all()
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    elapsed = time.monotonic() - started
+
+    return {
+        name: summarize(timings[name], elapsed, statuses=dict(statuses[name]))
+        for name in ENDPOINTS
+        if timings[name]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=ENDPOINTS,
+        default=ENDPOINTS,
+        help="in-process mode only",
+    )
+    parser.add_argument(
+        "--fast-hasher",
+        action="store_true",
+        help="use MD5 instead of PBKDF2 to see the cost of everything else",
+    )
+    parser.add_argument(
+        "--throttle",
+        action="store_true",
+        help="keep the throttles on (in-process mode)",
+    )
+    parser.add_argument("--url", help="run in load mode against this server")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.url:
+        import django
+        import os
+
+        # the server's own database, only used to read codes from the outbox
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+        django.setup()
+        results = run_load(args)
+        meta = run_metadata(
+            mode="load",
+            url=args.url,
+            concurrency=args.concurrency,
+            duration=args.duration,
+        )
+    else:
+        setup_django()
+        if not args.throttle:
+            disable_throttles()
+        if args.fast_hasher:
+            use_fast_hasher()
+        results = run_in_process(args)
+        meta = run_metadata(
+            mode="in-process",
+            iterations=args.iterations,
+            fast_hasher=args.fast_hasher,
+            throttle=args.throttle,
+        )
+
+    report(results, args.json, meta)
+
+
+if __name__ == "__main__":
+    main()
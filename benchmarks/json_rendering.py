@@ -0,0 +1,82 @@
+"""
+JSONRenderer/JSONParser vs the orjson backed FastJSONRenderer/FastJSONParser
+on the payloads our endpoints actually return and accept
+
+    python -m benchmarks.json_rendering --iterations 20000 --json out.json
+
+- login: LoginUser's tokens + user_data response
+- validation error: RegisterUser's 400 body
+- users page: 500 user rows, like a paginated admin/API listing
+"""
+
+import argparse
+import io
+
+from .utils import setup_django, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIClient
+    from django.urls import reverse
+
+    from authentication.exports import iter_users
+    from authentication.models import CustomUser
+    from authentication.parsers import FastJSONParser
+    from authentication.renderers import FastJSONRenderer
+    from authentication.serializer import RegisterSerializer
+
+    CustomUser.objects.bulk_create(
+        CustomUser(email=f"u{i}@example.com", username=f"u{i:07d}") for i in range(500)
+    )
+    user = CustomUser.objects.create_user(
+        email="bench@example.com", username="bench", password="Bench-pass-123"
+    )
+
+    # real response bodies, as the views build them
+    login = APIClient().post(
+        reverse("login"),
+        {"identifier": user.username, "password": "Bench-pass-123"},
+        format="json",
+    )
+    serializer = RegisterSerializer(
+        data={"email": user.email, "username": "!", "password": "123"}
+    )
+    serializer.is_valid()
+
+    payloads = {
+        "login": login.data,
+        "validation error": serializer.errors,
+        "users page": list(iter_users())[:500],
+    }
+    request_body = JSONRenderer().render(
+        {"identifier": "bench@example.com", "password": "Bench-pass-123"}
+    )
+
+    results = {}
+    for name, renderer in (("stdlib", JSONRenderer()), ("orjson", FastJSONRenderer())):
+        for payload_name, payload in payloads.items():
+            results[f"render {payload_name} ({name})"] = measure(
+                lambda: renderer.render(payload), args.iterations, count_queries=False
+            )
+
+    for name, json_parser in (("stdlib", JSONParser()), ("orjson", FastJSONParser())):
+        results[f"parse login request ({name})"] = measure(
+            lambda: json_parser.parse(io.BytesIO(request_body)),
+            args.iterations,
+            count_queries=False,
+        )
+
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Per-request cost of JWTAuthentication vs the opt-in ClaimsJWTAuthentication
+and CachedJWTAuthentication classes
+
+    python -m benchmarks.jwt_authentication --iterations 5000 --json out.json
+
+The db mode's extra cost is one user query, against the in-memory sqlite used
+here that is a lower bound of what a networked Postgres round trip costs.
+"""
+
+import argparse
+
+from .utils import setup_django, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    from authentication.authentication import (
+        ClaimsJWTAuthentication,
+        CachedJWTAuthentication,
+    )
+    from authentication.models import CustomUser
+    from authentication.tokens import UserRefreshToken
+
+    user = CustomUser.objects.create(email="bench@example.com", username="bench")
+    access = UserRefreshToken.for_user(user).access_token
+    request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    modes = {
+        "db (JWTAuthentication)": JWTAuthentication(),
+        "claims": ClaimsJWTAuthentication(),
+        "cached": CachedJWTAuthentication(),
+    }
+
+    results = {
+        name: measure(lambda: auth.authenticate(request), args.iterations)
+        for name, auth in modes.items()
+    }
+
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of signing and verifying access tokens with HS256 (SECRET_KEY), RS256
+and EdDSA keys from JWT_SIGNING, and of re-parsing the PEM every time
+
+    python -m benchmarks.jwt_signing --iterations 2000 --json out.json
+
+Keys are generated on the fly. "sign" is str(access_token) as LoginUser
+does it, "verify" is UserAccessToken(raw) as JWTAuthentication does it.
+"""
+
+import argparse
+
+from .utils import setup_django, measure, report
+
+
+def generate_keys():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    keys = {
+        "RS256": rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate(),
+    }
+
+    return {
+        name: key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        for name, key in keys.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.conf import settings
+    from django.test import override_settings
+
+    from authentication.jwks import KeyRingTokenBackend
+    from authentication.models import CustomUser
+    from authentication.tokens import UserAccessToken, UserRefreshToken
+
+    user = CustomUser.objects.create(email="bench@example.com", username="bench")
+    configs = {"HS256": {**settings.JWT_SIGNING, "KEYS": {}}}
+    for name, pem in generate_keys().items():
+        configs[name] = {
+            **settings.JWT_SIGNING,
+            "KEYS": {name: pem},
+            "SIGNING_KID": name,
+        }
+
+    results = {}
+    for name, config in configs.items():
+        with override_settings(JWT_SIGNING=config):
+            access = UserRefreshToken.for_user(user).access_token
+            raw = str(access)
+
+            results[f"{name} sign"] = measure(
+                lambda: str(access), args.iterations, count_queries=False
+            )
+            results[f"{name} verify"] = measure(
+                lambda: UserAccessToken(raw), args.iterations, count_queries=False
+            )
+
+            if config["KEYS"]:
+                # what signing costs when the key isn't kept parsed
+                results[f"{name} sign, PEM parsed per call"] = measure(
+                    lambda: KeyRingTokenBackend(
+                        config["KEYS"], config["SIGNING_KID"]
+                    ).encode(access.payload),
+                    args.iterations,
+                    count_queries=False,
+                )
+
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
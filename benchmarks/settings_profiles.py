@@ -0,0 +1,175 @@
+"""
+Startup time and per-request overhead of the full settings vs the lean `api`
+profile (config/settings/api.py)
+
+    python -m benchmarks.settings_profiles --iterations 2000 --json out.json
+
+Every profile runs in fresh subprocesses, startup is django.setup() plus
+loading the middleware chain and the url conf. Requests go through the whole
+WSGI handler with DEBUG off, throttles off and the MD5 hasher so what differs
+between profiles (middleware, apps, urls) isn't buried under PBKDF2:
+
+- not-found: unrouted GET, middleware + url resolving + 404 only
+- metrics: GET /metrics/ with an admin JWT
+- login: POST /auth/login/
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .utils import report, run_metadata, summarize
+
+PROFILES = {
+    "full": "config.settings.development",
+    "api": "config.settings.api",
+}
+
+
+def startup():
+    start = time.perf_counter()
+
+    import django
+
+    django.setup()
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import get_resolver
+
+    WSGIHandler()
+    get_resolver().url_patterns
+
+    return (time.perf_counter() - start) * 1000
+
+
+def run_requests(iterations):
+    import tempfile
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client, override_settings
+
+    from authentication.models import CustomUser
+    from authentication.tokens import UserRefreshToken
+
+    from .endpoints import disable_throttles, use_fast_hasher
+    from .utils import measure
+
+    connection.creation.create_test_db(verbosity=0)
+    disable_throttles()
+    use_fast_hasher()
+    override_settings(
+        DEBUG=False,
+        ALLOWED_HOSTS=["testserver"],
+        PERFORMANCE_TIMING={**settings.PERFORMANCE_TIMING, "SAMPLE_RATE": 0},
+        METRICS={**settings.METRICS, "DIRECTORY": tempfile.mkdtemp()},
+    ).enable()
+
+    admin = CustomUser.objects.create_user(
+        email="bench@example.com", username="bench", password="pass", is_staff=True
+    )
+    access = str(UserRefreshToken.for_user(admin).access_token)
+    client = Client()
+
+    def get(path, expected, **headers):
+        response = client.get(path, headers=headers)
+        assert response.status_code == expected, (path, response.status_code)
+
+    def login():
+        response = client.post(
+            "/auth/login/",
+            {"identifier": "bench", "password": "pass"},
+            content_type="application/json",
+        )
+        assert response.status_code == 200, response.status_code
+
+    scenarios = {
+        "not-found": lambda: get("/missing/", 404),
+        "metrics": lambda: get("/metrics/", 200, Authorization=f"Bearer {access}"),
+        "login": login,
+    }
+
+    return {
+        name: measure(func, iterations, warmup=20) for name, func in scenarios.items()
+    }
+
+
+def child(args):
+    results = {"startup_ms": startup()}
+
+    if args.iterations:
+        results["requests"] = run_requests(args.iterations)
+
+    print(json.dumps(results))
+
+
+def run_profile(settings_module, iterations):
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": settings_module,
+        "API_BASE_SETTINGS": "development",
+    }
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.settings_profiles",
+            "--child",
+            "--iterations",
+            str(iterations),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument(
+        "--startup-runs",
+        type=int,
+        default=10,
+        help="fresh processes timed per profile",
+    )
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args)
+
+    results = {}
+    for name, settings_module in PROFILES.items():
+        startups = [
+            run_profile(settings_module, 0)["startup_ms"]
+            for _ in range(args.startup_runs)
+        ]
+        results[f"{name} startup"] = summarize(startups, None)
+
+        requests = run_profile(settings_module, args.iterations)["requests"]
+        for scenario, result in requests.items():
+            results[f"{name} {scenario}"] = result
+
+    report(
+        results,
+        args.json,
+        run_metadata(
+            iterations=args.iterations,
+            startup_runs=args.startup_runs,
+            profiles=PROFILES,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Shared helpers for the benchmark scripts in this folder
+
+Run them from the project root with `python -m benchmarks.<name>`, they use an
+in-memory test database so db.sqlite3 is never touched.
+"""
+
+import json
+import os
+import statistics
+import time
+
+
+def setup_django(settings_module="config.settings.development"):
+    """Configure django and create a throwaway test database"""
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+
+    connection.creation.create_test_db(verbosity=0)
+
+
+def measure(func, iterations=1000, warmup=10, setup=None, count_queries=True):
+    """
+    Call func repeatedly, returns latency percentiles (ms), throughput and the
+    number of db queries per call
+
+    setup(i), if given, runs untimed before every call and its return value
+    is passed to func as positional arguments. Pass count_queries=False for
+    microsecond scale functions, capturing queries costs tens of µs per call.
+    """
+
+    from contextlib import nullcontext
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def call(i):
+        args = setup(i) if setup else ()
+        queries = (
+            CaptureQueriesContext(connection) if count_queries else nullcontext(())
+        )
+        start = time.perf_counter()
+
+        with queries as captured:
+            func(*args)
+
+        return (time.perf_counter() - start) * 1000, len(captured)
+
+    # warmup gets its own indices so setup() can rely on i being unique
+    for i in range(iterations, iterations + warmup):
+        call(i)
+
+    timings, query_counts = zip(*(call(i) for i in range(iterations)))
+
+    if not count_queries:
+        return summarize(timings, sum(timings) / 1000)
+
+    return summarize(
+        timings, sum(timings) / 1000, queries=sum(query_counts) / iterations
+    )
+
+
+def summarize(timings, elapsed, **extra):
+    timings = sorted(timings)
+    quantiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+
+    return {
+        "iterations": len(timings),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "p50_ms": round(quantiles[49], 4),
+        "p95_ms": round(quantiles[94], 4),
+        "p99_ms": round(quantiles[98], 4),
+        "throughput_per_s": round(len(timings) / elapsed, 1) if elapsed else None,
+        **extra,
+    }
+
+
+def run_metadata(**extra):
+    """What produced a result file, so runs can be compared meaningfully"""
+
+    import platform
+    import subprocess
+
+    import django
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "settings": os.environ.get("DJANGO_SETTINGS_MODULE"),
+        **extra,
+    }
+
+
+def report(results, json_path=None, meta=None):
+    """Print results as a table, and optionally write them as json to diff later"""
+
+    columns = ["mean_ms", "p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "queries"]
+    width = max(len(name) for name in results) + 2
+
+    print("".ljust(width) + "".join(column.rjust(18) for column in columns))
+    for name, result in results.items():
+        print(
+            name.ljust(width)
+            + "".join(str(result.get(column, "")).rjust(18) for column in columns)
+        )
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(
+                {"meta": meta or run_metadata(), "results": results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"\nResults written to {json_path}")
@@ -0,0 +1,63 @@
+"""
+Lean profile for servers that only answer JWT clients
+
+Same as the environment module it builds on, minus what only the admin and
+browser sessions use: no admin/sessions/messages apps, no session, CSRF,
+auth, messages or clickjacking middleware, JWT as the only DRF
+authentication and the admin-less config.urls_api. Run the admin (and
+`migrate`) from a separate process on the full profile.
+
+    DJANGO_SETTINGS_MODULE=config.settings.api
+    API_BASE_SETTINGS=production   # or development
+"""
+
+import os
+
+if os.getenv("API_BASE_SETTINGS", "production") == "development":
+    from .development import *
+else:
+    from .production import *
+
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+    )
+]
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware
+    not in (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    )
+]
+
+ROOT_URLCONF = "config.urls_api"
+
+# only docs/ renders a template
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "OPTIONS": {
+            "context_processors": ["django.template.context_processors.request"],
+        },
+    }
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "rest_framework_simplejwt.authentication.JWTAuthentication",
+    ),
+}
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -42,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "authentication.middleware.PerformanceTimingMiddleware",
+    "authentication.middleware.MetricsMiddleware",
+    "authentication.middleware.ReplicaPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -115,19 +119,41 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Custom User model
 AUTH_USER_MODEL = "authentication.CustomUser"
 
+# CustomUser.email is unique through its Lower("email") constraint, which the
+# check for a unique USERNAME_FIELD doesn't recognise
+SILENCED_SYSTEM_CHECKS = ["auth.E003"]
+
 
 REST_FRAMEWORK = {
+    # orjson backed drop-ins for JSONRenderer/JSONParser, same output
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "authentication.renderers.FastJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "authentication.parsers.FastJSONParser",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # sliding window limits for authentication.throttling, checked before any
+    # password hashing or email work. `_ip` scopes are per client IP, the
+    # others per email/username targeted. Uses the default cache, which must
+    # be shared (redis/memcached) when running several workers.
+    "DEFAULT_THROTTLE_RATES": {
+        "register_ip": "10/hour",
+        "login_ip": "30/min",
+        "login_identifier": "20/hour",
+        "email_code_ip": "20/hour",
+        "email_code": "5/hour",
+        "verify_code_ip": "30/hour",
+        "verify_code": "10/hour",
+    },
+    # Reverse proxies in front of the app. `_ip` scopes key on REMOTE_ADDR
+    # when 0, else on the X-Forwarded-For entry the outermost proxy appended,
+    # the rest of that header is client controlled.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
 }
 
 # Custom SPECTACULAR_SETTINGS and SIMPLE_JWT settings change as you see fit
@@ -140,7 +166,142 @@ SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
 
+# schema/ is generated once per process, from ARTIFACT when it was written by
+# `python manage.py build_schema` for the current url conf. SERVE exposes
+# schema/ and docs/ with DEBUG off too.
+OPENAPI_SCHEMA = {
+    "ARTIFACT": BASE_DIR / "openapi.json.gz",
+    "SERVE": os.getenv("SERVE_API_DOCS", "False") == "True",
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=3),
+    # tokens carry username/is_staff/is_superuser/is_verified claims
+    "TOKEN_OBTAIN_SERIALIZER": "authentication.serializer.UserTokenObtainPairSerializer",
+    # blacklist checks go through the in-memory filter below
+    "TOKEN_REFRESH_SERIALIZER": "authentication.serializer.UserTokenRefreshSerializer",
+    "TOKEN_BLACKLIST_SERIALIZER": "authentication.serializer.UserTokenBlacklistSerializer",
+    # verified with JWT_SIGNING's keys when it has any
+    "AUTH_TOKEN_CLASSES": ("authentication.tokens.UserAccessToken",),
+}
+
+# Asymmetric JWT signing, see authentication/jwks.py. JWT_KEYS_DIR holds one
+# <kid>.pem per key: private keys, or only the public half of retired keys
+# that still verify unexpired tokens. JWT_SIGNING_KID names the key signing
+# new tokens. Without keys tokens are HS256 signed with SECRET_KEY.
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+JWT_SIGNING = {
+    "KEYS": (
+        {path.stem: path.read_text() for path in Path(JWT_KEYS_DIR).glob("*.pem")}
+        if JWT_KEYS_DIR
+        else {}
+    ),
+    "SIGNING_KID": os.getenv("JWT_SIGNING_KID"),
+    # how long clients may cache /.well-known/jwks.json (seconds)
+    "JWKS_MAX_AGE": 300,
+}
+
+# Bloom filter of blacklisted refresh tokens, see authentication/blacklist.py.
+# Memory is ~1.8MB per million tokens at 0.1% false positives, run
+# `python manage.py blacklist_filter_stats` to check sizing.
+TOKEN_BLACKLIST_FILTER = {
+    "CAPACITY": 1_000_000,
+    "ERROR_RATE": 0.001,
+    "SYNC_INTERVAL": 5,  # seconds between incremental db syncs
+    # seconds before the newest blacklisted_at seen that syncs re-read, above
+    # the longest blacklisting transaction plus clock skew between servers
+    "SYNC_SLACK": 60,
+    # build the filter in a thread, refreshes check the db until it's ready
+    "LOAD_IN_BACKGROUND": True,
+}
+
+# How long CachedJWTAuthentication keeps a user in the cache (seconds),
+# entries are also dropped whenever the user is saved
+JWT_USER_CACHE_TIMEOUT = 60
+
+# Authenticate auth/me/ with CachedJWTAuthentication, so revalidating the
+# logged in user (304 or not) is served from the cache without any query
+ME_FROM_CACHE = False
+
+# Verification/reset emails are queued in the EmailOutbox table and delivered
+# by `python manage.py send_queued_emails`. TRANSPORT is a dotted path to a
+# callable taking (code, email) and returning True when the email was sent,
+# False or an exception (recorded as the message's last_error) when it wasn't.
+EMAIL_OUTBOX = {
+    "TRANSPORT": "authentication.uitls.send_verification_email",
+    "BATCH_SIZE": 50,
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_SECONDS": 30,
+    "POLL_INTERVAL": 2,
+    # sent/failed messages still hold the code and address, prune_expired
+    # deletes them this long after they were queued
+    "RETENTION_HOURS": 24,
+}
+
+# How send_verification_email delivers, BACKEND is one of authentication.uitls'
+# ResendEmailBackend (pooled keep-alive session, timeouts in seconds, circuit
+# breaker opening after FAILURE_THRESHOLD failures in a row for RESET_TIMEOUT
+# seconds), LocMemEmailBackend (tests/benchmarks) or FileEmailBackend (PATH).
+EMAIL_DELIVERY = {
+    "BACKEND": "authentication.uitls.ResendEmailBackend",
+    "CONNECT_TIMEOUT": float(os.getenv("EMAIL_CONNECT_TIMEOUT", "2")),
+    "READ_TIMEOUT": float(os.getenv("EMAIL_READ_TIMEOUT", "5")),
+    "POOL_SIZE": 10,
+    "FAILURE_THRESHOLD": 5,
+    "RESET_TIMEOUT": 30,
+}
+
+# Where email verification/password reset codes live. ModelCodeStore keeps them
+# in the db, CacheCodeStore keeps them in CACHES[CACHE_ALIAS] using its native
+# TTL (use a shared cache like redis/memcached when running several workers).
+ONE_TIME_CODES = {
+    "BACKEND": "authentication.codes.ModelCodeStore",
+    "TTL": 15 * 60,  # seconds
+}
+
+# Per-request timings (queries, db, hash, email, render) for a sample of
+# requests, see authentication/middleware.py. Logged as one JSON line on the
+# "authentication.performance" logger, HEADER also returns them to clients
+# as Server-Timing. It exposes internals to anyone, keep it off in production.
+PERFORMANCE_TIMING = {
+    "SAMPLE_RATE": float(os.getenv("PERFORMANCE_SAMPLE_RATE", "0.01")),
+    "HEADER": os.getenv("PERFORMANCE_TIMING_HEADER", "False") == "True",
+}
+
+# The app's own loggers, INFO and up to stderr (timings, development codes)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "simple": {"format": "{asctime} {levelname} {name} {message}", "style": "{"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+    },
+    "loggers": {
+        "authentication": {
+            "handlers": ["console"],
+            "level": os.getenv("AUTHENTICATION_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+# Request/auth metrics served at /metrics/ (admin only) in the Prometheus text
+# format, see authentication/metrics.py. Each worker process writes its own
+# file in DIRECTORY, all of them on the same host must share it.
+METRICS = {
+    "ENABLED": True,
+    "DIRECTORY": os.getenv("METRICS_DIR")
+    or os.path.join(tempfile.gettempdir(), "drf-boilerplate-metrics"),
+}
+
+# Read replicas for authentication.routers.ReplicaRouter, ALIASES are extra
+# DATABASES entries (production.py builds them from DB_REPLICA_* env vars).
+# Clients that wrote read from the primary for PIN_SECONDS afterwards, keep it
+# above the usual replication lag.
+READ_REPLICAS = {
+    "ALIASES": [],
+    "PIN_SECONDS": 5,
+    "HEALTH_CHECK_INTERVAL": 10,  # seconds an unavailable replica is skipped
 }
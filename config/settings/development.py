@@ -18,3 +18,9 @@ DATABASES = {
         "NAME": BASE_DIR / "db.sqlite3",
     }
 }
+
+# time every request locally, with the timings in a Server-Timing header
+PERFORMANCE_TIMING = {**PERFORMANCE_TIMING, "SAMPLE_RATE": 1.0, "HEADER": True}
+
+# write emails to sent_emails.jsonl instead of calling Resend
+EMAIL_DELIVERY = {"BACKEND": "authentication.uitls.FileEmailBackend"}
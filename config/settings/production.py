@@ -14,6 +14,17 @@ ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS").split(",")
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# Connections are reused instead of opened per request, either:
+# - DB_POOL=True: psycopg's connection pool in every worker process, sized
+#   with DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE (keep workers * max size under
+#   postgres' max_connections), requests wait DB_POOL_TIMEOUT seconds for a
+#   free connection. Requires psycopg[pool].
+# - otherwise persistent connections, kept DB_CONN_MAX_AGE seconds.
+# Either way CONN_HEALTH_CHECKS makes sure a reused connection is still alive.
+# Behind pgbouncer in transaction mode set DB_DISABLE_SERVER_SIDE_CURSORS=True.
+
+DB_POOL = os.getenv("DB_POOL", "False") == "True"
 
 DATABASES = {
     "default": {
@@ -23,5 +34,50 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # the pool owns connection lifetimes, django must close them every request
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv(
+            "DB_DISABLE_SERVER_SIDE_CURSORS", "False"
+        )
+        == "True",
+        "OPTIONS": {
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+        },
     }
 }
+
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+        "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+    }
+
+# Read replicas: DB_REPLICA_HOSTS=host1,host2, DB_REPLICA_PORT/NAME/USER/PASSWORD
+# default to the primary's
+REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",")]
+
+for number, host in enumerate(filter(None, REPLICA_HOSTS), start=1):
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": os.getenv("DB_REPLICA_PORT") or DATABASES["default"]["PORT"],
+        "NAME": os.getenv("DB_REPLICA_NAME") or DATABASES["default"]["NAME"],
+        "USER": os.getenv("DB_REPLICA_USER") or DATABASES["default"]["USER"],
+        "PASSWORD": os.getenv("DB_REPLICA_PASSWORD")
+        or DATABASES["default"]["PASSWORD"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+READ_REPLICAS = {
+    **READ_REPLICAS,
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    "PIN_SECONDS": int(os.getenv("DB_REPLICA_PIN_SECONDS", "5")),
+}
+
+if READ_REPLICAS["ALIASES"]:
+    DATABASE_ROUTERS = ["authentication.routers.ReplicaRouter"]
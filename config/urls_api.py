@@ -0,0 +1,35 @@
+"""
+Routes served to API clients, without the admin
+
+config.urls adds admin/ on top of these, the `api` settings profile
+(config/settings/api.py) serves only these.
+"""
+
+from django.urls import path, include
+from django.conf import settings
+from drf_spectacular.views import SpectacularSwaggerView
+from rest_framework_simplejwt.views import TokenRefreshView, TokenBlacklistView
+
+from authentication.views import Metrics, TokenObtainPair
+from authentication.jwks import JWKSView
+from authentication.schema import CachedSchemaView
+
+urlpatterns = [
+    # jwt tokens
+    path("token/", TokenObtainPair.as_view(), name="token_obtain_pair"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/blacklist/", TokenBlacklistView.as_view(), name="token_blacklist"),
+    # public keys for verifying tokens elsewhere
+    path(".well-known/jwks.json", JWKSView.as_view(), name="jwks"),
+    # auth
+    path("auth/", include("authentication.urls")),
+    # prometheus scrape target, admin only
+    path("metrics/", Metrics.as_view(), name="metrics"),
+]
+
+# Don't show schema in production unless OPENAPI_SCHEMA["SERVE"] is set
+if settings.DEBUG or settings.OPENAPI_SCHEMA["SERVE"]:
+    urlpatterns += [
+        path("schema/", CachedSchemaView.as_view(), name="schema"),
+        path("docs/", SpectacularSwaggerView.as_view(url_name="schema")),
+    ]